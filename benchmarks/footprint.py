@@ -0,0 +1,86 @@
+import glob
+import io
+import os
+import sys
+import tracemalloc
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules.bar_store import from_csv_frame, to_epoch
+from modules.trade_ledger import CSV_COLUMNS, TradeRecord
+
+
+def csv_bytes(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return len(buffer.getvalue().encode())
+
+
+def traced_bytes(build):
+    """Bytes still allocated by the object build() returns."""
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def bar_footprint(csv_file):
+    """Memory and CSV size of one OHLCV file in the legacy string layout and in the typed bar layout."""
+    legacy = pd.read_csv(csv_file)
+    compact = from_csv_frame(legacy)
+    return {
+        'rows': len(legacy),
+        'legacy_memory': int(legacy.memory_usage(deep=True).sum()),
+        'compact_memory': int(compact.memory_usage(deep=True).sum()),
+        'legacy_csv': os.path.getsize(csv_file),
+        'compact_csv': csv_bytes(compact),
+    }
+
+
+def trade_footprint(csv_file):
+    """Memory of one signal file held as dict records versus TradeRecords, and its CSV size both ways."""
+    df = pd.read_csv(csv_file)[CSV_COLUMNS]
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+    buy_times = to_epoch(df['Buy Time']).tolist()
+    closed = df['Close Time'].notna()
+    close_times = [time if is_closed else None for time, is_closed in
+                   zip(to_epoch(df['Close Time'].fillna(df['Buy Time'])).tolist(), closed)]
+    compact = pd.DataFrame({
+        'buy_time': buy_times,
+        'buy_price': df['Buy Price'],
+        'take_profit': df['Take Profit'],
+        'stop_loss': df['Stop Loss'],
+        'close': df['Close'],
+        'close_time': pd.array(close_times, dtype='Int64'),
+    })
+    return {
+        'rows': len(df),
+        'legacy_memory': traced_bytes(lambda: [dict(zip(CSV_COLUMNS, [str(row[0])] + row[1:])) for row in rows]),
+        'compact_memory': traced_bytes(lambda: [TradeRecord(buy_time, *row[1:5], close_time)
+                                                for buy_time, close_time, row in zip(buy_times, close_times, rows)]),
+        'legacy_csv': os.path.getsize(csv_file),
+        'compact_csv': csv_bytes(compact),
+    }
+
+
+def print_table(title, results):
+    print(title)
+    print(f"{'file':28s} {'rows':>6s} {'memory legacy':>14s} {'compact':>10s} {'csv legacy':>11s} {'compact':>10s}")
+    for name, r in results.items():
+        print(f"{name:28s} {r['rows']:6d} {r['legacy_memory']:14d} {r['compact_memory']:10d} "
+              f"{r['legacy_csv']:11d} {r['compact_csv']:10d}")
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.footprint [data_dir]
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'data')
+    print_table('Bars', {os.path.basename(f): bar_footprint(f)
+                         for f in sorted(glob.glob(os.path.join(data_dir, '*_Real_Time_OHLCV.csv')))})
+    print_table('Trades', {os.path.basename(f): trade_footprint(f)
+                           for f in sorted(glob.glob(os.path.join(data_dir, '*_Signal_system.csv')))})
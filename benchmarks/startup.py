@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, 'benchmarks', 'startup_budget.json')
+
+# Entry points whose import cost is measured in a fresh interpreter
+IMPORTS = ['main', 'stock_ai', 'modules.engine']
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started, flush=True)
+"""
+
+# Control panel: time until Tk has drawn the window
+FIRST_WINDOW_SCRIPT = """
+from ui_controller import TradingAppUI
+ui = TradingAppUI()
+ui.root.update()
+print('ready', flush=True)
+ui.root.destroy()
+"""
+
+# Fetch pipeline on the offline feed: time until the first bars are published
+FIRST_BAR_SCRIPT = """
+import os
+from modules.data_fetcher import start_data_fetching
+from modules.event_bus import event_bus, bars_topic
+ohlcv_file = os.path.join('data', 'BENCH_USD_Real_Time_OHLCV.csv')
+subscription = event_bus.subscribe(bars_topic(ohlcv_file))
+start_data_fetching(None, ohlcv_file, os.path.join('data', 'BENCH_USD_Signal_system.csv'), 'BENCHUSD', 'BENCH',
+                    os.path.join('config', 'strategy_config.json'))
+subscription.get(timeout=60)
+print('ready', flush=True)
+os._exit(0)
+"""
+
+
+def run_child(script, cwd=ROOT, env=None, timeout=120):
+    """
+    Run a script in a fresh interpreter and return (seconds until its first output line, that line).
+    The time includes interpreter startup, which is what a user waits for.
+    """
+    child_env = dict(os.environ, PYTHONPATH=ROOT, **(env or {}))
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', script], cwd=cwd, env=child_env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline().strip()
+        elapsed = time.perf_counter() - started
+        _, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        raise RuntimeError("timed out")
+    if not line:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"exit code {process.returncode}")
+    return elapsed, line
+
+
+def measure_import(module, repeat):
+    """Median import time of a module (in-process) and median launch-to-imported time."""
+    imports, launches = [], []
+    for _ in range(repeat):
+        elapsed, line = run_child(IMPORT_SCRIPT.format(module=module))
+        launches.append(elapsed)
+        imports.append(float(line))
+    return {'import': statistics.median(imports), 'launch': statistics.median(launches)}
+
+
+def measure_first_window(repeat):
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        raise RuntimeError("no display")
+    return statistics.median(run_child(FIRST_WINDOW_SCRIPT)[0] for _ in range(repeat))
+
+
+def measure_first_bar(repeat):
+    """Launch-to-first-bar on the offline FakeFeed, in a scratch directory with no stored bars."""
+    timings = []
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='stock_ai_startup_')
+        try:
+            os.makedirs(os.path.join(workdir, 'config'))
+            shutil.copy(os.path.join(ROOT, 'config', 'strategy_config.json'), os.path.join(workdir, 'config'))
+            timings.append(run_child(FIRST_BAR_SCRIPT, cwd=workdir, env={'STOCK_AI_FEED': 'fake'})[0])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return statistics.median(timings)
+
+
+def run(repeat=3):
+    """Measure every startup metric; metrics that cannot run here are recorded as skipped."""
+    results, skipped = {}, {}
+
+    def record(name, measure):
+        try:
+            value = measure()
+        except Exception as e:
+            skipped[name] = str(e)
+            return
+        if isinstance(value, dict):
+            results.update({f"{name}.{key}": item for key, item in value.items()})
+        else:
+            results[name] = value
+
+    for module in IMPORTS:
+        record(f"import {module}", lambda: measure_import(module, repeat))
+    record('first_window', lambda: measure_first_window(repeat))
+    record('first_bar', lambda: measure_first_bar(repeat))
+    return results, skipped
+
+
+def check_budget(results, budget):
+    """Return the metrics that exceed their budget as {name: (seconds, budget)}."""
+    return {name: (results[name], limit) for name, limit in budget.items()
+            if name in results and results[name] > limit}
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.startup [--repeat 3] [--output startup.json]
+    parser = argparse.ArgumentParser(description="Measure import time, time to first window and time to first bar")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per metric; the median is reported")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE, 'r') as f:
+        budget = json.load(f)
+    results, skipped = run(args.repeat)
+    over_budget = check_budget(results, budget)
+
+    for name, value in results.items():
+        limit = budget.get(name)
+        status = '' if limit is None else ('  OVER BUDGET' if name in over_budget else f"  (budget {limit:.2f}s)")
+        print(f"{name:32s} {value:8.3f}s{status}")
+    for name, reason in skipped.items():
+        print(f"{name:32s}  skipped: {reason}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': 'startup', 'python': sys.version.split()[0], 'timestamp': time.time(),
+                       'results': results, 'skipped': skipped, 'budget': budget,
+                       'over_budget': sorted(over_budget)}, f, indent=2)
+    sys.exit(1 if over_budget else 0)
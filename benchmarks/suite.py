@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from indicators.cache import indicator_cache
+from indicators.macd import calculate_macd
+from indicators.rsi import RSI
+from indicators.stochrsi import StochRSI
+from modules.bar_store import BarStore, Signal, from_csv_frame, to_csv_frame
+from modules.resampler import resample_bars
+from utils.trading_strategy import TradingStrategy
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STRATEGY_CONFIG = os.path.join(ROOT, 'config', 'strategy_config.json')
+
+# A case slower than this many times its baseline counts as a regression in --compare
+DEFAULT_THRESHOLD = 1.25
+
+
+class _NullChart:
+    def marker(self, **kwargs):
+        pass
+
+
+def synthetic_bars(rows, seed=0):
+    """Deterministic 1-minute OHLCV random walk in the layout of the stored bars."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, rows)) * close
+    times = pd.Timestamp('2024-01-01').value // 10**9 + 60 * np.arange(rows, dtype=np.int64)
+    return pd.DataFrame({
+        'time': times,
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(1, 1000, rows).astype(float),
+    })
+
+
+def datasets(sizes, include_data_files=True):
+    """Yield (name, bars) for every synthetic size and every checked-in data/*_Real_Time_OHLCV.csv."""
+    for rows in sizes:
+        yield f"synthetic_{rows}", synthetic_bars(rows)
+    if include_data_files:
+        for csv_file in sorted(glob.glob(os.path.join(ROOT, 'data', '*_Real_Time_OHLCV.csv'))):
+            df = from_csv_frame(pd.read_csv(csv_file))[['time', 'open', 'high', 'low', 'close', 'volume']]
+            yield os.path.basename(csv_file).replace('_Real_Time_OHLCV.csv', ''), df
+
+
+def repeats_for(rows):
+    # Enough runs on small inputs for a stable median without making 10M rows take minutes
+    return max(1, min(10, 200_000 // max(rows, 1)))
+
+
+def time_case(run, setup=None, repeat=3):
+    """Run `run(setup())` `repeat` times; setup is excluded from the timing."""
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def case_indicators(bars):
+    close = bars['close']
+    return {
+        'rsi': lambda _: RSI(close, 14),
+        'macd': lambda _: calculate_macd(bars, 12, 26, 9),
+        'stochrsi': lambda _: StochRSI(close, 14),
+    }
+
+
+def bench_dataset(name, bars, workdir, cases=None):
+    """Time every case on one dataset; returns a list of result dicts."""
+    rows = len(bars)
+    repeat = repeats_for(rows)
+    strategy = TradingStrategy(STRATEGY_CONFIG)
+    results = []
+
+    def record(case, timings):
+        results.append({
+            'case': case,
+            'dataset': name,
+            'rows': rows,
+            'repeat': len(timings),
+            'best_s': min(timings),
+            'median_s': statistics.median(timings),
+            'rows_per_s': rows / min(timings) if min(timings) > 0 else None,
+        })
+
+    def wanted(case):
+        return cases is None or case in cases
+
+    for case, run in case_indicators(bars).items():
+        if wanted(case):
+            record(case, time_case(run, repeat=repeat))
+
+    if wanted('resample_1h'):
+        record('resample_1h', time_case(lambda _: resample_bars(bars, '1h'), repeat=repeat))
+
+    if wanted('calculate_indicators'):
+        # Cold cache on every run, as for a new bar range
+        def setup():
+            indicator_cache.clear()
+            return bars.copy()
+        record('calculate_indicators', time_case(strategy.calculate_indicators, setup, repeat))
+
+    with_indicators = strategy.calculate_indicators(bars.copy()).fillna(0)
+    with_indicators['signal'] = np.int8(Signal.HOLD)
+
+    if wanted('generate_signals'):
+        def setup_signals():
+            path = tempfile.mkdtemp(dir=workdir)
+            return (TradingStrategy(STRATEGY_CONFIG), with_indicators.copy(), BarStore(os.path.join(path, 'bars')),
+                    os.path.join(path, 'BENCH_Signal_system.csv'))
+
+        def generate(state):
+            signal_strategy, df, store, signal_file = state
+            with contextlib.redirect_stdout(io.StringIO()):
+                signal_strategy.generate_signals(df, _NullChart(), signal_file, store)
+        record('generate_signals', time_case(generate, setup_signals, repeat))
+
+    if wanted('ohlcv_csv_roundtrip'):
+        csv_file = os.path.join(workdir, f"{name}.csv")
+
+        def csv_roundtrip(_):
+            to_csv_frame(with_indicators, '1m').to_csv(csv_file, index=False)
+            from_csv_frame(pd.read_csv(csv_file))
+        record('ohlcv_csv_roundtrip', time_case(csv_roundtrip, repeat=repeat))
+
+    if wanted('bar_store_roundtrip'):
+        def setup_store():
+            return BarStore(tempfile.mkdtemp(dir=workdir))
+
+        def store_roundtrip(store):
+            store.upsert(with_indicators)
+            store.read()
+        record('bar_store_roundtrip', time_case(store_roundtrip, setup_store, repeat))
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, include_data_files=True, cases=None):
+    """Run the suite and return the JSON-serialisable report."""
+    workdir = tempfile.mkdtemp(prefix='stock_ai_bench_')
+    results = []
+    try:
+        for name, bars in datasets(sizes, include_data_files):
+            started = time.perf_counter()
+            results.extend(bench_dataset(name, bars, workdir, cases))
+            print(f"{name}: {len(bars)} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            shutil.rmtree(workdir, ignore_errors=True)
+            os.makedirs(workdir, exist_ok=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'benchmark': 'suite',
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Match results by (case, dataset) and return rows of (case, dataset, baseline_s, current_s, ratio),
+    plus the subset whose best time grew by more than `threshold`.
+    """
+    before = {(r['case'], r['dataset']): r['best_s'] for r in baseline['results']}
+    rows, regressions = [], []
+    for result in current['results']:
+        key = (result['case'], result['dataset'])
+        if key not in before or before[key] <= 0:
+            continue
+        row = key + (before[key], result['best_s'], result['best_s'] / before[key])
+        rows.append(row)
+        if row[-1] > threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def print_results(report):
+    for r in report['results']:
+        print(f"{r['case']:22s} {r['dataset']:20s} {r['rows']:>10d} rows  best {r['best_s'] * 1000:10.2f}ms  "
+              f"median {r['median_s'] * 1000:10.2f}ms")
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.suite [--sizes 1000,10000] [--output results.json]
+    #        python -m benchmarks.suite --compare baseline.json current.json
+    parser = argparse.ArgumentParser(description="Offline benchmarks for indicators, signals and bar persistence")
+    parser.add_argument('--sizes', help="comma-separated synthetic row counts (default 1k..1M; up to 10M)")
+    parser.add_argument('--cases', help="comma-separated subset of cases to run")
+    parser.add_argument('--no-data-files', action='store_true', help="skip the checked-in data/*.csv files")
+    parser.add_argument('--output', help="write the JSON report here (default benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help="compare two JSON reports")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio that fails --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        rows, regressions = compare(baseline, current, args.threshold)
+        for case, dataset, before, after, ratio in rows:
+            flag = '  REGRESSION' if ratio > args.threshold else ''
+            print(f"{case:22s} {dataset:20s} {before * 1000:10.2f}ms -> {after * 1000:10.2f}ms  x{ratio:.2f}{flag}")
+        sys.exit(1 if regressions else 0)
+
+    sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else DEFAULT_SIZES
+    cases = set(args.cases.split(',')) if args.cases else None
+    report = run(sizes, not args.no_data_files, cases)
+    print_results(report)
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,54 @@
+import hashlib
+import numpy as np
+from .kernels import as_float_array
+from .registry import IndicatorGraph, strategy_requests
+
+# Columns returned by IndicatorPanel.compute, in the order of the bar store
+PANEL_COLUMNS = ['rsi', 'macd', 'macd_signal', 'macd_hist', 'stochrsi_K', 'stochrsi_D']
+
+
+class IndicatorPanel:
+    """
+    Close series of several symbols packed into one (symbols x bars) float64 array.
+
+    Histories may have different lengths: each row is left-aligned and padded with NaN
+    past its own length. The kernels are causal, so the padding never reaches a symbol's
+    real bars and one vectorized pass computes every symbol at once.
+    """
+
+    def __init__(self, symbols, closes):
+        self.symbols = list(symbols)
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.lengths = np.array([len(values) for values in closes], dtype=np.int64)
+        width = int(self.lengths.max()) if len(self.lengths) else 0
+        self.closes = np.full((len(self.symbols), width), np.nan)
+        for row, values in enumerate(closes):
+            self.closes[row, :self.lengths[row]] = as_float_array(values)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Build a panel from {symbol: DataFrame with a 'close' column}."""
+        return cls(frames.keys(), [frame['close'].to_numpy(dtype=np.float64) for frame in frames.values()])
+
+    @property
+    def mask(self):
+        """Boolean (symbols x bars) array that is True on each symbol's real bars."""
+        return np.arange(self.closes.shape[1]) < self.lengths[:, None]
+
+    def compute(self, rsi_period=14, macd_fast_period=12, macd_slow_period=26, macd_signal_period=9,
+                stochrsi_period=14):
+        """Return {column: (symbols x bars) array} for every indicator the strategy uses."""
+        graph = IndicatorGraph(strategy_requests(rsi_period, macd_fast_period, macd_slow_period, macd_signal_period,
+                                                 stochrsi_period))
+        return graph.evaluate({'close': self.closes})
+
+    def data_key(self):
+        """Identify the packed closes by symbols, lengths and a hash of the values, for IndicatorCache keys."""
+        digest = hashlib.blake2b(np.ascontiguousarray(self.closes).tobytes(), digest_size=16).hexdigest()
+        return (tuple(self.symbols), tuple(self.lengths.tolist()), digest)
+
+    def view(self, results, symbol):
+        """Return {column: 1-D view} of one symbol's real bars in the results of compute(); nothing is copied."""
+        row = self.index[symbol]
+        length = self.lengths[row]
+        return {column: values[row, :length] for column, values in results.items()}
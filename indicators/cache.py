@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def _nbytes(value):
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
+
+
+def data_key(data, symbol=None, interval=None):
+    """
+    Identify an input bar range by symbol, interval, length, index bounds and a hash of its values.
+    `data` is a Series or a DataFrame of every bar column the indicators read.
+    """
+    values = np.ascontiguousarray(data.to_numpy(dtype=np.float64))
+    digest = hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+    bounds = (data.index[0], data.index[-1]) if len(data) else (None, None)
+    columns = tuple(data.columns) if isinstance(data, pd.DataFrame) else None
+    return (symbol, interval, len(data), bounds, columns, digest)
+
+
+class IndicatorCache:
+    """
+    LRU memo of indicator results keyed by (indicator, parameters, input data key).
+    Entries are evicted least-recently-used first once `max_bytes` is exceeded.
+    Cached Series are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = _nbytes(value)
+        with self.lock:
+            if key not in self.entries and size <= self.max_bytes:
+                self.entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'evictions': self.evictions,
+            }
+
+
+# Process-wide cache used when callers do not pass their own
+indicator_cache = IndicatorCache()
+
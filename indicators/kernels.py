@@ -0,0 +1,202 @@
+import os
+import numpy as np
+
+# Numba is optional: without it (or with STOCK_AI_NO_JIT=1) the pure NumPy kernels are used
+try:
+    if os.environ.get('STOCK_AI_NO_JIT') == '1':
+        raise ImportError
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Largest growth factor a block of the NumPy EWM may reach before it is rebased (keeps float64 exact enough)
+_MAX_BLOCK_GROWTH = np.log(1e100)
+
+
+def as_float_array(values):
+    """Return values as a contiguous float64 array: 1-D for one series, 2-D (symbols x bars) for a batch."""
+    array = np.ascontiguousarray(values, dtype=np.float64)
+    if array.ndim not in (1, 2):
+        raise ValueError(f"Expected a 1-D or 2-D array, got {array.ndim}-D")
+    return array
+
+
+def _ewm(x, alpha, seed):
+    """
+    In-place EWM with adjust=False along the last axis: x[..., j] becomes
+    (1 - alpha) * previous + alpha * x[..., j], where the value before x[..., 0] is `seed`.
+
+    Each block uses the closed form y_j = d^(j+1) * (seed + alpha * sum_k x_k * d^-(k+1)), d = 1 - alpha,
+    so the recursion costs one cumsum per block instead of a Python loop per bar.
+    """
+    decay = 1.0 - alpha
+    n = x.shape[-1]
+    if n == 0 or decay == 0.0:
+        return x
+    block = int(max(1, min(n, _MAX_BLOCK_GROWTH // -np.log(decay))))
+    growth = decay ** -np.arange(1, block + 1, dtype=np.float64)
+    carry = np.asarray(seed, dtype=np.float64)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        weights = growth[:stop - start]
+        chunk = x[..., start:stop]
+        sums = np.cumsum(chunk * weights, axis=-1)
+        sums *= alpha
+        sums += carry[..., None]
+        np.divide(sums, weights, out=chunk)
+        carry = chunk[..., -1].copy()
+    return x
+
+
+def _wilder_rsi_numpy(close, period, out):
+    delta = np.diff(close, axis=-1)
+    up = np.maximum(delta, 0.0)
+    down = np.minimum(delta, 0.0, out=delta)
+    np.negative(down, out=down)
+
+    # Seed with the simple mean of the first `period` moves, then smooth with alpha = 1/period
+    alpha = 1.0 / period
+    for moves in (up, down):
+        seed = moves[..., :period].mean(axis=-1)
+        moves[..., period - 1] = seed
+        _ewm(moves[..., period:], alpha, seed)
+
+    # x/0 -> inf -> 100 and 0/0 -> nan, as with the pandas implementation
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.divide(up[..., period - 1:], down[..., period - 1:], out=up[..., period - 1:])
+    rs += 1.0
+    np.divide(100.0, rs, out=rs)
+    np.subtract(100.0, rs, out=out[..., period:])
+    return out
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _wilder_rsi_jit(close, period, out):
+        rows, n = close.shape
+        alpha = 1.0 / period
+        for row in range(rows):
+            avg_up = 0.0
+            avg_down = 0.0
+            for t in range(1, n):
+                delta = close[row, t] - close[row, t - 1]
+                up = delta if delta > 0 else 0.0
+                down = -delta if delta < 0 else 0.0
+                if delta != delta:
+                    up = down = delta
+                if t < period:
+                    avg_up += up
+                    avg_down += down
+                    continue
+                if t == period:
+                    avg_up = (avg_up + up) / period
+                    avg_down = (avg_down + down) / period
+                else:
+                    avg_up = (1 - alpha) * avg_up + alpha * up
+                    avg_down = (1 - alpha) * avg_down + alpha * down
+                if avg_down == 0:
+                    out[row, t] = 100.0 if avg_up > 0 else np.nan
+                else:
+                    out[row, t] = 100 - 100 / (1 + avg_up / avg_down)
+        return out
+
+
+def wilder_rsi(close, period=14):
+    """
+    Wilder RSI of one series (1-D) or a batch of equal-length series (2-D, one row per symbol).
+    Returns an array of the input's shape; the first `period` bars are NaN.
+    """
+    close = as_float_array(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= period:
+        return out
+    if njit is not None:
+        _wilder_rsi_jit(close.reshape(-1, close.shape[-1]), period, out.reshape(-1, out.shape[-1]))
+        return out
+    return _wilder_rsi_numpy(close, period, out)
+
+
+def _rolling(values, window, ufunc):
+    """
+    Fold `ufunc` (np.minimum, np.maximum or np.add) over trailing windows along the last axis,
+    one shifted pass per window element; the first window - 1 bars are NaN.
+    """
+    out = np.full(values.shape, np.nan)
+    n = values.shape[-1]
+    if n >= window:
+        result = out[..., window - 1:]
+        result[...] = values[..., window - 1:]
+        for shift in range(1, window):
+            ufunc(result, values[..., window - 1 - shift:n - shift], out=result)
+    return out
+
+
+def stochrsi(rsi, period=14, smooth_k=3, smooth_d=3):
+    """StochRSI %K and %D from an RSI array (1-D or 2-D), matching indicators.stochrsi.StochRSI."""
+    rsi = as_float_array(rsi)
+    low = _rolling(rsi, period, np.minimum)
+    high = _rolling(rsi, period, np.maximum)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.subtract(high, low, out=high)
+        np.subtract(rsi, low, out=low)
+        stoch = np.divide(low, high, out=low)
+    k = _rolling(stoch, smooth_k, np.add)
+    k *= 100 / smooth_k
+    d = _rolling(k, smooth_d, np.add)
+    d /= smooth_d
+    return k, d
+
+
+def ema(values, span):
+    """EMA along the last axis, like pandas ewm(span=span, adjust=False) seeded with the first value."""
+    out = np.array(as_float_array(values))
+    if out.shape[-1]:
+        _ewm(out[..., 1:], 2.0 / (span + 1), out[..., 0])
+    return out
+
+
+def macd(close, fastperiod=12, slowperiod=26, signalperiod=9):
+    """MACD line, signal and histogram of a 1-D or 2-D close array, matching indicators.macd.calculate_macd."""
+    line = ema(close, fastperiod)
+    line -= ema(close, slowperiod)
+    signal = ema(line, signalperiod)
+    return line, signal, line - signal
+
+
+def sma(values, period):
+    """Simple moving average along the last axis; the first period - 1 bars are NaN."""
+    out = _rolling(as_float_array(values), period, np.add)
+    out /= period
+    return out
+
+
+def rolling_std(values, period):
+    """Population standard deviation over trailing windows along the last axis; the first period - 1 bars are NaN."""
+    values = as_float_array(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= period:
+        out[..., period - 1:] = np.lib.stride_tricks.sliding_window_view(values, period, axis=-1).std(axis=-1)
+    return out
+
+
+def wilder_atr(high, low, close, period=14):
+    """Average true range with Wilder smoothing, seeded with the mean true range of bars 1..period."""
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= period:
+        return out
+    previous = close[..., :-1]
+    true_range = np.maximum(high[..., 1:], previous) - np.minimum(low[..., 1:], previous)
+    seed = true_range[..., :period].mean(axis=-1)
+    out[..., period] = seed
+    out[..., period + 1:] = true_range[..., period:]
+    _ewm(out[..., period + 1:], 1.0 / period, seed)
+    return out
+
+
+def vwap(high, low, close, volume):
+    """Cumulative volume-weighted average of the typical price (high + low + close) / 3."""
+    high, low, close, volume = (as_float_array(values) for values in (high, low, close, volume))
+    typical = (high + low + close) / 3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.cumsum(typical * volume, axis=-1) / np.cumsum(volume, axis=-1)
@@ -0,0 +1,186 @@
+from .kernels import ema, wilder_rsi, stochrsi, sma, rolling_std, wilder_atr, vwap
+
+# Bar columns an indicator can read directly
+SOURCES = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Indicator:
+    """
+    One registered indicator.
+
+    `inputs(params)` lists what it reads: bar columns from SOURCES or (indicator name, params)
+    references, whose first output is passed in. `compute(*inputs, **params)` returns a tuple
+    of arrays, named by `columns` (formatted with the params). `chart` is (pane title or None
+    for the price chart, [(column, series name, 'line' or 'histogram', color)]).
+    """
+
+    __slots__ = ('name', 'inputs', 'params', 'compute', 'columns', 'chart')
+
+    def __init__(self, name, inputs, params, compute, columns, chart=None):
+        self.name = name
+        self.inputs = inputs
+        self.params = params
+        self.compute = compute
+        self.columns = columns
+        self.chart = chart
+
+    def column_names(self, params):
+        return [column.format(**params) for column in self.columns]
+
+
+REGISTRY = {}
+
+
+def register(indicator):
+    """Add an indicator to the registry (replacing one of the same name) and return it."""
+    REGISTRY[indicator.name] = indicator
+    return indicator
+
+
+def _macd(fast_ema, slow_ema, fast, slow, signal):
+    line = fast_ema - slow_ema
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def _bollinger(middle, close, period, width):
+    spread = rolling_std(close, period) * width
+    return middle + spread, middle, middle - spread
+
+
+register(Indicator(
+    'ema', lambda p: ['close'], {'span': 20},
+    lambda close, span: (ema(close, span),),
+    ['ema_{span}'],
+    (None, [('ema_{span}', 'EMA {span}', 'line', 'rgb(255, 193, 7)')])))
+
+register(Indicator(
+    'sma', lambda p: ['close'], {'period': 20},
+    lambda close, period: (sma(close, period),),
+    ['sma_{period}'],
+    (None, [('sma_{period}', 'SMA {period}', 'line', 'rgb(0, 188, 212)')])))
+
+register(Indicator(
+    'rsi', lambda p: ['close'], {'period': 14},
+    lambda close, period: (wilder_rsi(close, period),),
+    ['rsi'],
+    ('RSI', [('rsi', 'RSI', 'line', 'rgb(126, 87, 194)')])))
+
+register(Indicator(
+    'stochrsi', lambda p: [('rsi', {'period': p['period']})], {'period': 14, 'smooth_k': 3, 'smooth_d': 3},
+    lambda rsi, period, smooth_k, smooth_d: stochrsi(rsi, period, smooth_k, smooth_d),
+    ['stochrsi_K', 'stochrsi_D'],
+    ('StochRSI', [('stochrsi_K', 'StochRSI %K', 'line', 'rgb(255,255,255)'),
+                  ('stochrsi_D', 'StochRSI %D', 'line', 'rgb(255,0,255)')])))
+
+register(Indicator(
+    'macd', lambda p: [('ema', {'span': p['fast']}), ('ema', {'span': p['slow']})],
+    {'fast': 12, 'slow': 26, 'signal': 9},
+    _macd,
+    ['macd', 'macd_signal', 'macd_hist'],
+    ('MACD', [('macd', 'MACD', 'line', 'rgb(41, 98, 255)'),
+              ('macd_signal', 'MACD Signal', 'line', 'rgb(255, 109, 0)'),
+              ('macd_hist', 'MACD Histogram', 'histogram', None)])))
+
+register(Indicator(
+    'atr', lambda p: ['high', 'low', 'close'], {'period': 14},
+    lambda high, low, close, period: (wilder_atr(high, low, close, period),),
+    ['atr'],
+    ('ATR', [('atr', 'ATR', 'line', 'rgb(244, 67, 54)')])))
+
+register(Indicator(
+    'bollinger', lambda p: [('sma', {'period': p['period']}), 'close'], {'period': 20, 'width': 2.0},
+    _bollinger,
+    ['bb_upper', 'bb_middle', 'bb_lower'],
+    (None, [('bb_upper', 'BB Upper', 'line', 'rgba(33, 150, 243, 0.6)'),
+            ('bb_middle', 'BB Middle', 'line', 'rgba(33, 150, 243, 0.3)'),
+            ('bb_lower', 'BB Lower', 'line', 'rgba(33, 150, 243, 0.6)')])))
+
+register(Indicator(
+    'vwap', lambda p: ['high', 'low', 'close', 'volume'], {},
+    lambda high, low, close, volume: (vwap(high, low, close, volume),),
+    ['vwap'],
+    (None, [('vwap', 'VWAP', 'line', 'rgb(76, 175, 80)')])))
+
+
+class IndicatorGraph:
+    """
+    Dependency graph of the indicators requested as (registry name, params) pairs.
+
+    Nodes are keyed by indicator and full parameter set, so an input several indicators
+    share (the RSI under StochRSI, the EMAs under MACD and an EMA ribbon) is one node that
+    evaluate() computes once per bar batch. Only the requested indicators and their inputs
+    are built; everything else in the registry is pruned.
+    """
+
+    def __init__(self, requests):
+        self.nodes = {}  # key -> (indicator, params, inputs); dependencies are inserted first
+        self.outputs = []
+        for name, params in requests:
+            key = self._add(name, params)
+            if key not in self.outputs:
+                self.outputs.append(key)
+
+    def _add(self, name, params):
+        indicator = REGISTRY.get(name)
+        if indicator is None:
+            raise ValueError(f"Unknown indicator: {name!r}")
+        unknown = set(params) - set(indicator.params)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+        resolved = dict(indicator.params, **params)
+        key = (name, tuple(sorted(resolved.items())))
+        if key not in self.nodes:
+            inputs = [source if isinstance(source, str) else self._add(*source) for source in indicator.inputs(resolved)]
+            self.nodes[key] = (indicator, resolved, inputs)
+        return key
+
+    @property
+    def sources(self):
+        """The bar columns the graph reads."""
+        return sorted({source for _, _, inputs in self.nodes.values() for source in inputs if isinstance(source, str)})
+
+    @property
+    def columns(self):
+        """Output columns of the requested indicators, in request order."""
+        return [column for key in self.outputs for column in self.nodes[key][0].column_names(self.nodes[key][1])]
+
+    def evaluate(self, bars, cache=None, data_key=None):
+        """
+        Compute every node once, in dependency order, over `bars` ({source: 1-D or 2-D array}).
+        With a cache, node results are memoised under (node key, data_key).
+        Returns {column: array} for the requested indicators.
+        """
+        values = {}
+        for key, (indicator, params, inputs) in self.nodes.items():
+            args = [bars[source] if isinstance(source, str) else values[source][0] for source in inputs]
+            if cache is None:
+                values[key] = indicator.compute(*args, **params)
+            else:
+                values[key] = cache.get_or_compute((key, data_key), lambda: indicator.compute(*args, **params))
+        results = {}
+        for key in self.outputs:
+            indicator, params, _ = self.nodes[key]
+            results.update(zip(indicator.column_names(params), values[key]))
+        return results
+
+    def chart_panes(self):
+        """[(pane title or None, [(column, series name, kind, color)])] of the requested indicators that chart."""
+        panes = []
+        for key in self.outputs:
+            indicator, params, _ = self.nodes[key]
+            if indicator.chart is not None:
+                pane, series = indicator.chart
+                panes.append((pane, [(column.format(**params), name.format(**params), kind, color)
+                                     for column, name, kind, color in series]))
+        return panes
+
+
+def strategy_requests(rsi_period=14, macd_fast_period=12, macd_slow_period=26, macd_signal_period=9,
+                      stochrsi_period=14):
+    """Graph requests for the indicators the trading strategy reads, from its config periods."""
+    return [
+        ('rsi', {'period': rsi_period}),
+        ('macd', {'fast': macd_fast_period, 'slow': macd_slow_period, 'signal': macd_signal_period}),
+        ('stochrsi', {'period': stochrsi_period}),
+    ]
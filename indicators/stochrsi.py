@@ -1,9 +1,12 @@
 import numpy as np
+import pandas as pd
+from .kernels import stochrsi
 from .rsi import RSI
 
-def StochRSI(series, period=14, smoothK=3, smoothD=3):
-    rsi = RSI(series, period)
-    stochrsi = (rsi - rsi.rolling(period).min()) / (rsi.rolling(period).max() - rsi.rolling(period).min())
-    stochrsi_k = stochrsi.rolling(smoothK).mean() * 100
-    stochrsi_d = stochrsi_k.rolling(smoothD).mean()
-    return stochrsi_k, stochrsi_d
\ No newline at end of file
+def StochRSI(series, period=14, smoothK=3, smoothD=3, rsi=None):
+    # Callers that already have RSI(series, period) can pass it in to skip recomputing it
+    if rsi is None:
+        rsi = RSI(series, period)
+    rsi = rsi.reindex(series.index)
+    stochrsi_k, stochrsi_d = stochrsi(rsi.to_numpy(dtype=np.float64), period, smoothK, smoothD)
+    return pd.Series(stochrsi_k, index=series.index), pd.Series(stochrsi_d, index=series.index)
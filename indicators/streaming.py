@@ -0,0 +1,382 @@
+import json
+import math
+from collections import deque
+from datetime import datetime, timezone
+from utils.storage import atomic_write
+
+NAN = float('nan')
+
+
+def _rsi_from_averages(avg_up, avg_down):
+    # Mirror the pandas division semantics used by the batch RSI (x/0 -> inf, 0/0 -> nan)
+    if avg_down == 0:
+        if avg_up == 0 or math.isnan(avg_up):
+            return NAN
+        return 100.0
+    rs = avg_up / avg_down
+    return 100 - 100 / (1 + rs)
+
+
+class StreamingRSI:
+    """Wilder RSI updated one close at a time, matching indicators.rsi.RSI."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.sum_up = 0.0
+        self.sum_down = 0.0
+        self.avg_up = None
+        self.avg_down = None
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return NAN
+
+        delta = close - self.prev_close
+        self.prev_close = close
+        up = delta if delta > 0 else 0.0
+        down = -delta if delta < 0 else 0.0
+        self.count += 1
+
+        if self.avg_up is None:
+            # Seed the averages with the simple mean of the first `period` moves
+            self.sum_up += up
+            self.sum_down += down
+            if self.count < self.period:
+                return NAN
+            self.avg_up = self.sum_up / self.period
+            self.avg_down = self.sum_down / self.period
+        else:
+            alpha = 1.0 / self.period
+            self.avg_up = (1 - alpha) * self.avg_up + alpha * up
+            self.avg_down = (1 - alpha) * self.avg_down + alpha * down
+
+        return _rsi_from_averages(self.avg_up, self.avg_down)
+
+    def get_state(self):
+        return {
+            'period': self.period,
+            'prev_close': self.prev_close,
+            'count': self.count,
+            'sum_up': self.sum_up,
+            'sum_down': self.sum_down,
+            'avg_up': self.avg_up,
+            'avg_down': self.avg_down,
+        }
+
+    def set_state(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+
+class StreamingEMA:
+    """EMA with adjust=False, seeded with the first observation like pandas ewm."""
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+    def get_state(self):
+        return {'span': self.span, 'value': self.value}
+
+    def set_state(self, state):
+        self.span = state['span']
+        self.alpha = 2.0 / (self.span + 1)
+        self.value = state['value']
+
+
+class StreamingMACD:
+    """MACD line, signal and histogram updated one close at a time."""
+
+    def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
+        self.fast = StreamingEMA(fastperiod)
+        self.slow = StreamingEMA(slowperiod)
+        self.signal = StreamingEMA(signalperiod)
+
+    def update(self, close):
+        macd = self.fast.update(close) - self.slow.update(close)
+        macd_signal = self.signal.update(macd)
+        return macd, macd_signal, macd - macd_signal
+
+    def get_state(self):
+        return {
+            'fast': self.fast.get_state(),
+            'slow': self.slow.get_state(),
+            'signal': self.signal.get_state(),
+        }
+
+    def set_state(self, state):
+        self.fast.set_state(state['fast'])
+        self.slow.set_state(state['slow'])
+        self.signal.set_state(state['signal'])
+
+
+class RollingMinMax:
+    """Rolling min/max over a fixed window using monotonic deques (amortised O(1))."""
+
+    def __init__(self, window):
+        self.window = window
+        self.index = 0
+        self.valid = deque()  # indexes of the last `window` observations that were not NaN
+        self.mins = deque()   # (index, value) pairs with increasing values
+        self.maxs = deque()   # (index, value) pairs with decreasing values
+
+    def update(self, x):
+        i = self.index
+        self.index += 1
+        start = i - self.window + 1
+
+        while self.valid and self.valid[0] < start:
+            self.valid.popleft()
+        while self.mins and self.mins[0][0] < start:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < start:
+            self.maxs.popleft()
+
+        if not math.isnan(x):
+            self.valid.append(i)
+            while self.mins and self.mins[-1][1] >= x:
+                self.mins.pop()
+            self.mins.append((i, x))
+            while self.maxs and self.maxs[-1][1] <= x:
+                self.maxs.pop()
+            self.maxs.append((i, x))
+
+        # Like pandas rolling(window), a window containing any NaN yields NaN
+        if len(self.valid) < self.window:
+            return NAN, NAN
+        return self.mins[0][1], self.maxs[0][1]
+
+    def get_state(self):
+        return {
+            'window': self.window,
+            'index': self.index,
+            'valid': list(self.valid),
+            'mins': [list(pair) for pair in self.mins],
+            'maxs': [list(pair) for pair in self.maxs],
+        }
+
+    def set_state(self, state):
+        self.window = state['window']
+        self.index = state['index']
+        self.valid = deque(state['valid'])
+        self.mins = deque(tuple(pair) for pair in state['mins'])
+        self.maxs = deque(tuple(pair) for pair in state['maxs'])
+
+
+class RollingMean:
+    """Rolling mean over a small fixed window; NaN until the window is full of numbers."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+
+    def update(self, x):
+        self.values.append(x)
+        if len(self.values) < self.window or any(math.isnan(v) for v in self.values):
+            return NAN
+        return sum(self.values) / self.window
+
+    def get_state(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    def set_state(self, state):
+        self.window = state['window']
+        self.values = deque(state['values'], maxlen=self.window)
+
+
+class StreamingStochRSI:
+    """StochRSI %K/%D updated one close at a time, matching indicators.stochrsi.StochRSI."""
+
+    def __init__(self, period=14, smoothK=3, smoothD=3):
+        self.rsi = StreamingRSI(period)
+        self.range = RollingMinMax(period)
+        self.k = RollingMean(smoothK)
+        self.d = RollingMean(smoothD)
+
+    def update(self, close):
+        return self.update_rsi(self.rsi.update(close))
+
+    def update_rsi(self, rsi):
+        lowest, highest = self.range.update(rsi)
+        width = highest - lowest
+        if math.isnan(width) or width == 0:
+            stochrsi = NAN
+        else:
+            stochrsi = (rsi - lowest) / width
+        k = self.k.update(stochrsi) * 100
+        return k, self.d.update(k)
+
+    def get_state(self):
+        return {
+            'rsi': self.rsi.get_state(),
+            'range': self.range.get_state(),
+            'k': self.k.get_state(),
+            'd': self.d.get_state(),
+        }
+
+    def set_state(self, state):
+        self.rsi.set_state(state['rsi'])
+        self.range.set_state(state['range'])
+        self.k.set_state(state['k'])
+        self.d.set_state(state['d'])
+
+
+class IndicatorEngine:
+    """
+    Stateful RSI/MACD/StochRSI engine for one symbol.
+
+    Each call to update() costs constant time. Re-sending the last bar (the
+    still-forming candle) replaces it instead of advancing the state.
+    """
+
+    COLUMNS = ['rsi', 'macd', 'macd_signal', 'macd_hist', 'stochrsi_K', 'stochrsi_D']
+
+    # Parameters and output columns of each indicator, for recomputing only what a config change touches
+    PARAM_GROUPS = {
+        'rsi': ['rsi_period'],
+        'macd': ['macd_fast_period', 'macd_slow_period', 'macd_signal_period'],
+        'stochrsi': ['stochrsi_period'],
+    }
+    GROUP_COLUMNS = {
+        'rsi': ['rsi'],
+        'macd': ['macd', 'macd_signal', 'macd_hist'],
+        'stochrsi': ['stochrsi_K', 'stochrsi_D'],
+    }
+
+    def __init__(self, rsi_period=14, macd_fast_period=12, macd_slow_period=26, macd_signal_period=9, stochrsi_period=14):
+        self.params = {
+            'rsi_period': rsi_period,
+            'macd_fast_period': macd_fast_period,
+            'macd_slow_period': macd_slow_period,
+            'macd_signal_period': macd_signal_period,
+            'stochrsi_period': stochrsi_period,
+        }
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD(macd_fast_period, macd_slow_period, macd_signal_period)
+        self.stochrsi = StreamingStochRSI(stochrsi_period)
+        self.last_time = None
+        self.last_values = None
+        self.prev_state = None
+
+    def _indicator_state(self):
+        return {
+            'rsi': self.rsi.get_state(),
+            'macd': self.macd.get_state(),
+            'stochrsi': self.stochrsi.get_state(),
+        }
+
+    def _set_indicator_state(self, state):
+        self.rsi.set_state(state['rsi'])
+        self.macd.set_state(state['macd'])
+        self.stochrsi.set_state(state['stochrsi'])
+
+    def update(self, time, close):
+        """Feed one bar and return a dict of indicator values for it."""
+        if self.last_time is not None and time < self.last_time:
+            raise ValueError(f"Bar at {time} is older than the last processed bar {self.last_time}")
+        if time == self.last_time:
+            # Revision of the current bar: roll back to the state before it was applied
+            self._set_indicator_state(self.prev_state)
+        else:
+            self.prev_state = self._indicator_state()
+
+        rsi = self.rsi.update(close)
+        macd, macd_signal, macd_hist = self.macd.update(close)
+        stochrsi_k, stochrsi_d = self.stochrsi.update(close)
+
+        self.last_time = time
+        self.last_values = dict(zip(self.COLUMNS, (rsi, macd, macd_signal, macd_hist, stochrsi_k, stochrsi_d)))
+        return self.last_values
+
+    def update_frame(self, df):
+        """
+        Stream every bar of df that is not older than the last processed bar.
+        Returns only those rows, with the indicator columns filled in.
+        """
+        if self.last_time is not None:
+            df = df[df['time'] >= self.last_time]
+        df = df.copy()
+        rows = [self.update(time, close) for time, close in zip(df['time'].tolist(), df['close'].tolist())]
+        for column in self.COLUMNS:
+            df[column] = [row[column] for row in rows]
+        return df
+
+    def _new_indicator(self, group):
+        params = self.params
+        if group == 'rsi':
+            return StreamingRSI(params['rsi_period'])
+        if group == 'macd':
+            return StreamingMACD(params['macd_fast_period'], params['macd_slow_period'], params['macd_signal_period'])
+        return StreamingStochRSI(params['stochrsi_period'])
+
+    def reconfigure(self, closes, **params):
+        """
+        Switch to new periods, rebuilding only the indicators whose periods changed by
+        replaying `closes` (every bar processed so far, oldest first) through them.
+        Returns {column: list of recomputed values} for those bars; unchanged indicators keep their state.
+        """
+        groups = [group for group, keys in self.PARAM_GROUPS.items()
+                  if any(key in params and params[key] != self.params[key] for key in keys)]
+        self.params.update(params)
+        recomputed = {}
+        for group in groups:
+            indicator = self._new_indicator(group)
+            rows, prev_state = [], None
+            for i, close in enumerate(closes):
+                if i == len(closes) - 1:
+                    prev_state = indicator.get_state()  # Lets the still-forming bar be revised
+                values = indicator.update(close)
+                rows.append(values if isinstance(values, tuple) else (values,))
+            setattr(self, group, indicator)
+            if self.prev_state is not None and prev_state is not None:
+                self.prev_state[group] = prev_state
+            for column, values in zip(self.GROUP_COLUMNS[group], zip(*rows)):
+                recomputed[column] = list(values)
+                if self.last_values is not None:
+                    self.last_values[column] = values[-1]
+        return recomputed
+
+    def matches(self, **params):
+        return all(self.params.get(key) == value for key, value in params.items())
+
+    def get_state(self):
+        return {
+            'params': self.params,
+            'last_time': self.last_time,
+            'last_values': self.last_values,
+            'prev_state': self.prev_state,
+            'indicators': self._indicator_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(**state['params'])
+        engine._set_indicator_state(state['indicators'])
+        engine.last_time = state['last_time']
+        if isinstance(engine.last_time, str):
+            # Saved by versions that streamed 'YYYY-MM-DD HH:MM:SS' dates
+            engine.last_time = int(datetime.fromisoformat(engine.last_time).replace(tzinfo=timezone.utc).timestamp())
+        engine.last_values = state['last_values']
+        engine.prev_state = state['prev_state']
+        return engine
+
+    def save(self, state_file):
+        """Persist the engine state so a restarted process can resume without warm-up."""
+        with atomic_write(state_file) as f:
+            json.dump(self.get_state(), f)
+
+    @classmethod
+    def load(cls, state_file):
+        with open(state_file, 'r') as f:
+            return cls.from_state(json.load(f))
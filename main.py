@@ -1,11 +1,11 @@
+import argparse
 import csv
 import subprocess
 import os
 import sys
-import pandas as pd
 import signal
-import psutil
 from ui_controller import TradingAppUI
+from modules.trade_results import ledger_sources, update_combined_trades
 
 def get_virtual_env_python():
     """Return the path to the Python interpreter in the current virtual environment."""
@@ -22,25 +22,56 @@ def run_stock_ai(symbol, exchange, title, filename):
         print(f"Error starting process: {e}")
         return None
 
+def load_targets():
+    """Return the rows of config/targets.csv."""
+    with open(os.path.join('config', 'targets.csv'), mode='r') as file:
+        return list(csv.DictReader(file))
+
+def load_targets_and_run_engine(max_symbols=4, workers=2):
+    """Run every target inside this process on the asyncio engine instead of one process per target."""
+    from modules.engine import TradingEngine
+    from utils.metrics import start_metrics_reporting
+    from utils.file_utils import get_strategy_config_file
+
+    ui = TradingAppUI()
+    engine = None
+
+    def on_start_trading(event):
+        nonlocal engine
+        start_metrics_reporting()
+        engine = TradingEngine(load_targets(), get_strategy_config_file(), max_symbols=max_symbols, workers=workers)
+        engine.start()
+
+    def on_stop_trading(event):
+        nonlocal engine
+        if engine is not None:
+            engine.stop()
+            engine = None
+        print("Trading engine stopped")
+
+    ui.root.bind('<<StartTrading>>', on_start_trading)
+    ui.root.bind('<<StopTrading>>', on_stop_trading)
+    ui.run()
+    on_stop_trading(None)
+
 def load_targets_and_run():
     """Load targets from CSV and run the stock_ai.py script for each."""
     ui = TradingAppUI()
     running_processes = []
 
     def on_start_trading(event):
-        with open(os.path.join('config', 'targets.csv'), mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                symbol = row['Symbol']
-                exchange = row['Exchange']
-                title = row['Title']
-                filename = row['Filename']
-                print(f"Running stock_ai.py for {symbol} on {exchange}...")
-                process = run_stock_ai(symbol, exchange, title, filename)
-                if process is not None:
-                    running_processes.append(process)
+        for row in load_targets():
+            symbol = row['Symbol']
+            exchange = row['Exchange']
+            title = row['Title']
+            filename = row['Filename']
+            print(f"Running stock_ai.py for {symbol} on {exchange}...")
+            process = run_stock_ai(symbol, exchange, title, filename)
+            if process is not None:
+                running_processes.append(process)
 
     def on_stop_trading(event):
+        import psutil
         for process in running_processes:
             try:
                 if process is not None:
@@ -83,44 +114,26 @@ def load_targets_and_run():
     ui.run()
 
 def combine_signal_files():
-    """Combine all signal system files into a single data/result.csv with a PAIR column first and sorted by Buy Time."""
+    """Merge the trade ledgers into data/result.csv with a PAIR column first, sorted by Buy Time."""
     target_file = os.path.join('data', 'result.csv')
-    all_data = []
+    sources = ledger_sources(load_targets())
 
-    # Load targets from CSV
-    with open(os.path.join('config', 'targets.csv'), mode='r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            title = row['Title']
-            filename = row['Filename']
-            
-            signal_system_file = os.path.join('data', f"{filename}_Signal_system.csv")
-            
-            if os.path.exists(signal_system_file):
-                # Read each signal system file and add the "PAIR" column
-                data = pd.read_csv(signal_system_file)
-                data['PAIR'] = f"{title}"
-                all_data.append(data)
-            else:
-                print(f"Warning: {signal_system_file} does not exist.")
-
-    if all_data:
-        # Combine all data into a single DataFrame
-        combined_data = pd.concat(all_data, ignore_index=True)
-
-        # Reorder columns to have "PAIR" first
-        columns = ['PAIR', 'Buy Time', 'Buy Price', 'Take Profit', 'Stop Loss', 'Close', 'Close Time', '%']
-        combined_data = combined_data[columns]
-
-        # Sort by "Buy Time"
-        combined_data.sort_values(by=['Buy Time'], inplace=True)
-
-        # Save to data/result.csv
-        combined_data.to_csv(target_file, index=False)
+    if sources:
+        # Only trades since the last combine are merged in; older rows stay as written
+        update_combined_trades(sources, target_file)
         print(f"Combined result saved to {target_file}.")
     else:
         print("No data to combine.")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Trading bot control panel")
+    parser.add_argument('--engine', action='store_true', help="run all targets in one process instead of one stock_ai.py per target")
+    parser.add_argument('--max-symbols', type=int, default=4, help="maximum number of symbols fetched/processed concurrently in engine mode")
+    parser.add_argument('--workers', type=int, default=2, help="size of the indicator worker pool in engine mode")
+    args = parser.parse_args()
+
     combine_signal_files()
-    load_targets_and_run()
+    if args.engine:
+        load_targets_and_run_engine(args.max_symbols, args.workers)
+    else:
+        load_targets_and_run()
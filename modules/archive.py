@@ -0,0 +1,134 @@
+import csv
+import gzip
+import os
+import shutil
+import numpy as np
+from utils.storage import atomic_write
+
+SECONDS_PER_DAY = 86400
+
+
+def day_start(time):
+    """Epoch seconds of the start of the (naive local) day containing `time`."""
+    return time // SECONDS_PER_DAY * SECONDS_PER_DAY
+
+
+def day_label(time):
+    return str(np.datetime64(int(day_start(time)), 's'))[:10]
+
+
+class BarArchive:
+    """
+    Bars rolled out of a BarStore, one compressed partition per day (archive/YYYY-MM-DD.npz).
+    Partitions are written atomically; archiving a day again merges by timestamp, newest wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _partition_file(self, label):
+        return os.path.join(self.path, f"{label}.npz")
+
+    def days(self):
+        """Labels of the archived days, oldest first."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.path) if name.endswith('.npz'))
+
+    def _load(self, label):
+        with np.load(self._partition_file(label)) as partition:
+            return {column: partition[column] for column in partition.files}
+
+    def write(self, columns):
+        """Archive {column: array} rows (sorted by 'time') into their day partitions; returns the days written."""
+        os.makedirs(self.path, exist_ok=True)
+        days = day_start(columns['time'])
+        bounds = np.flatnonzero(np.r_[True, days[1:] != days[:-1], True])
+        labels = []
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            part = {column: values[first:last] for column, values in columns.items()}
+            label = day_label(part['time'][0])
+            if os.path.exists(self._partition_file(label)):
+                stored = self._load(label)
+                merged = {column: np.concatenate([stored[column], part[column]]) for column in part}
+                _, newest = np.unique(merged['time'][::-1], return_index=True)
+                keep = len(merged['time']) - 1 - newest
+                part = {column: values[keep] for column, values in merged.items()}
+            with atomic_write(self._partition_file(label), 'wb') as f:
+                np.savez_compressed(f, **part)
+            labels.append(label)
+        return labels
+
+    def read(self, start_time=None, end_time=None):
+        """Return {column: array} of the archived bars in [start_time, end_time), or None if there are none."""
+        first_label = None if start_time is None else day_label(start_time)
+        end_label = None if end_time is None else day_label(end_time)
+        parts = []
+        for label in self.days():
+            if (first_label is not None and label < first_label) or (end_label is not None and label > end_label):
+                continue
+            part = self._load(label)
+            mask = np.ones(len(part['time']), dtype=bool)
+            if start_time is not None:
+                mask &= part['time'] >= start_time
+            if end_time is not None:
+                mask &= part['time'] < end_time
+            parts.append({column: values[mask] for column, values in part.items()})
+        if not parts:
+            return None
+        return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class TradeArchive:
+    """
+    Closed trades rolled out of a TradeLedger, one gzipped CSV partition per Buy Time day
+    (YYYY-MM-DD.csv.gz). Rows are (id, *CSV_COLUMNS) tuples typed like the ledger's.
+    """
+
+    # Converters for id, Buy Time, Buy Price, Take Profit, Stop Loss, Close, Close Time, %
+    TYPES = (int, str, float, float, float, float, str, str)
+
+    def __init__(self, path):
+        self.path = path
+
+    def _partition_file(self, label):
+        return os.path.join(self.path, f"{label}.csv.gz")
+
+    def days(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-7] for name in os.listdir(self.path) if name.endswith('.csv.gz'))
+
+    def _load(self, label):
+        with gzip.open(self._partition_file(label), 'rt', newline='') as f:
+            return [tuple(None if value == '' else convert(value) for convert, value in zip(self.TYPES, row))
+                    for row in csv.reader(f)]
+
+    def write(self, rows):
+        """Archive rows sorted by Buy Time into their day partitions, merging by id with what is there."""
+        os.makedirs(self.path, exist_ok=True)
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[1][:10], []).append(row)
+        for label, day_rows in by_day.items():
+            if os.path.exists(self._partition_file(label)):
+                merged = {row[0]: row for row in self._load(label)}
+                merged.update((row[0], row) for row in day_rows)
+                day_rows = sorted(merged.values(), key=lambda row: row[1])
+            with atomic_write(self._partition_file(label), 'wb') as raw, \
+                    gzip.open(raw, 'wt', newline='') as f:
+                csv.writer(f, lineterminator='\n').writerows(
+                    ['' if value is None else value for value in row] for row in day_rows)
+        return sorted(by_day)
+
+    def rows(self, since=None, until=None):
+        """Yield archived trades bought in [since, until), in Buy Time order, one partition at a time."""
+        for label in self.days():
+            if (since is not None and label < since[:10]) or (until is not None and label > until[:10]):
+                continue
+            for row in self._load(label):
+                if (since is None or row[1] >= since) and (until is None or row[1] < until):
+                    yield row
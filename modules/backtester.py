@@ -0,0 +1,217 @@
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from indicators.batch import IndicatorPanel
+from utils.trading_strategy import compute_signal_conditions
+from modules.config_service import INDICATOR_PARAMS
+from utils.logging_utils import logging
+
+SIGNAL_PARAMS = ['rsi_overbought', 'rsi_oversold', 'stochrsi_overbought', 'stochrsi_oversold', 'take_profit', 'stop_loss']
+
+# Indicator columns the signal conditions read, in the order group_indicator_arrays returns them
+GROUP_COLUMNS = ['stochrsi_K', 'rsi', 'macd', 'macd_signal']
+
+DEFAULT_GRID = {
+    'rsi_period': [7, 14, 21],
+    'macd_fast_period': [8, 12],
+    'macd_slow_period': [21, 26],
+    'macd_signal_period': [9],
+    'rsi_overbought': [65, 70, 75],
+    'rsi_oversold': [25, 30, 35],
+    'take_profit': [0.5, 1.0, 2.0],
+    'stop_loss': [0.5, 1.0],
+}
+
+
+def load_config(config_file):
+    with open(config_file, 'r') as f:
+        return json.load(f)
+
+
+def expand_grid(grid, base_config):
+    """Return one config dict per combination of the grid values, on top of base_config."""
+    keys = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = dict(base_config)
+        config.update(zip(keys, values))
+        if config['macd_fast_period'] < config['macd_slow_period']:
+            configs.append(config)
+    return configs
+
+
+def group_indicator_arrays(panel, periods, cache=None):
+    """
+    RSI/MACD/StochRSI for one period set over every symbol of an IndicatorPanel, in one pass,
+    with the same NaN -> 0 fill the live store applies. Returns {symbol: (stochrsi_k, rsi, macd, macd_signal)}
+    of per-symbol views into the panel results. With an IndicatorCache, the panel results are
+    memoised under the periods and the panel's data key; the views are then shared and read-only.
+    """
+    def compute():
+        indicators = panel.compute(**periods)
+        columns = tuple(indicators[column] for column in GROUP_COLUMNS)
+        for values in columns:
+            values[np.isnan(values)] = 0
+        return columns
+
+    if cache is None:
+        columns = compute()
+    else:
+        columns = cache.get_or_compute(('group_indicator_arrays', tuple(sorted(periods.items())), panel.data_key()),
+                                       compute)
+    indicators = dict(zip(GROUP_COLUMNS, columns))
+    arrays = {}
+    for symbol in panel.symbols:
+        view = panel.view(indicators, symbol)
+        arrays[symbol] = tuple(view[column] for column in GROUP_COLUMNS)
+    return arrays
+
+
+def next_true_index(mask):
+    """For every bar, the index of the first True at or after it (len(mask) if none), plus a sentinel."""
+    n = len(mask)
+    index = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(index[::-1])[::-1], n)
+
+
+def simulate_trades(close, high, low, open_condition, close_condition, take_profit, stop_loss, open_=None):
+    """
+    Replay the single-position open/close state machine of TradingStrategy.apply_signals
+    with take-profit/stop-loss exits checked against each later bar's high/low.
+    Entries fill at the signal bar's close. Exits follow utils.position_engine.bar_fill:
+    a bar that opens through a level fills at its open, and when one bar touches both
+    levels the stop is assumed to fill first. Returns the percentage return of every closed trade.
+    """
+    n = len(close)
+    next_open = next_true_index(open_condition).tolist()
+    next_close = next_true_index(close_condition).tolist()
+    open_ = close if open_ is None else open_
+    close, high, low, open_ = close.tolist(), high.tolist(), low.tolist(), open_.tolist()
+    tp_factor = 1 + take_profit / 100
+    sl_factor = 1 - stop_loss / 100
+
+    returns = []
+    i = 0
+    while i < n:
+        entry_index = next_open[i]
+        if entry_index >= n:
+            break
+        entry = close[entry_index]
+        tp_price = entry * tp_factor
+        sl_price = entry * sl_factor
+
+        # The indicator exit bounds the bars that need a high/low check
+        signal_exit = next_close[entry_index + 1]
+        exit_index, exit_price = None, None
+        for j in range(entry_index + 1, min(signal_exit + 1, n)):
+            if open_[j] <= sl_price or open_[j] >= tp_price:
+                exit_index, exit_price = j, open_[j]  # Gapped through a level
+                break
+            if low[j] <= sl_price:
+                exit_index, exit_price = j, sl_price
+                break
+            if high[j] >= tp_price:
+                exit_index, exit_price = j, tp_price
+                break
+        if exit_index is None:
+            if signal_exit >= n:
+                break  # Still open at the end of the data; not counted
+            exit_index, exit_price = signal_exit, close[signal_exit]
+
+        returns.append((exit_price - entry) / entry * 100)
+        i = exit_index + 1  # Like the live state machine, no re-entry on the closing bar
+    return np.asarray(returns)
+
+
+def summarize(returns):
+    """P&L, win rate and maximum drawdown (all in %) from a list of trade returns."""
+    if len(returns) == 0:
+        return {'trades': 0, 'pnl': 0.0, 'win_rate': 0.0, 'max_drawdown': 0.0}
+    equity = np.cumprod(1 + returns / 100)
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return {
+        'trades': int(len(returns)),
+        'pnl': float((equity[-1] - 1) * 100),
+        'win_rate': float((returns > 0).mean() * 100),
+        'max_drawdown': float(((peak - equity) / peak).max() * 100),
+    }
+
+
+def evaluate_group(symbol_bars, configs):
+    """Evaluate configs that share the same indicator periods over every symbol; runs inside a worker process."""
+    panel = IndicatorPanel(symbol_bars.keys(), [bars[0] for bars in symbol_bars.values()])
+    indicators = group_indicator_arrays(panel, {key: configs[0][key] for key in INDICATOR_PARAMS})
+    results = []
+    for symbol, (close, high, low, open_) in symbol_bars.items():
+        stochrsi_k, rsi, macd, macd_signal = indicators[symbol]
+        for config in configs:
+            open_condition, close_condition = compute_signal_conditions(
+                stochrsi_k, rsi, macd, macd_signal, config['rsi_overbought'], config['rsi_oversold'],
+                config['stochrsi_overbought'], config['stochrsi_oversold'])
+            returns = simulate_trades(close, high, low, open_condition, close_condition,
+                                      config['take_profit'], config['stop_loss'], open_)
+            result = {'symbol': symbol}
+            result.update((key, config[key]) for key in INDICATOR_PARAMS + SIGNAL_PARAMS)
+            result.update(summarize(returns))
+            results.append(result)
+    return results
+
+
+def load_bars(ohlcv_file):
+    """Read the archived and hot bars from the bar store (falling back to the legacy CSV)."""
+    from modules.bar_store import open_bar_store, from_csv_frame
+    df = open_bar_store(ohlcv_file).read_history()
+    if df.empty and os.path.exists(ohlcv_file):
+        df = from_csv_frame(pd.read_csv(ohlcv_file))
+    return df
+
+
+def run_backtests(frames, grid=None, base_config=None, max_workers=None):
+    """
+    Run every configuration of the grid over the bars of each symbol in {symbol: DataFrame}
+    and return a DataFrame of metrics (with a 'symbol' column) sorted by P&L. Configurations
+    are grouped by indicator periods; each worker computes a period set once for all symbols
+    in a single batched pass and reuses it for every level/TP/SL variant.
+    """
+    base_config = load_config(os.path.join('config', 'strategy_config.json')) if base_config is None else base_config
+    configs = expand_grid(DEFAULT_GRID if grid is None else grid, base_config)
+    symbol_bars = {symbol: tuple(df[column].to_numpy(dtype=np.float64) for column in ('close', 'high', 'low', 'open'))
+                   for symbol, df in frames.items()}
+
+    groups = {}
+    for config in configs:
+        groups.setdefault(tuple(config[key] for key in INDICATOR_PARAMS), []).append(config)
+
+    started = time.time()
+    results = []
+    if max_workers == 1:
+        for group in groups.values():
+            results.extend(evaluate_group(symbol_bars, group))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for group_results in executor.map(evaluate_group, itertools.repeat(symbol_bars), groups.values()):
+                results.extend(group_results)
+    bars = sum(len(df) for df in frames.values())
+    logging.info(f"Backtested {len(configs)} configurations over {len(frames)} symbols ({bars} bars) "
+                 f"in {time.time() - started:.2f}s")
+    return pd.DataFrame(results).sort_values('pnl', ascending=False).reset_index(drop=True)
+
+
+def run_backtest(df, grid=None, base_config=None, max_workers=None):
+    """Run every configuration of the grid over the bars in df; see run_backtests."""
+    return run_backtests({None: df}, grid, base_config, max_workers).drop(columns='symbol')
+
+
+if __name__ == '__main__':
+    # Usage: python -m modules.backtester data/BTC_USD_Real_Time_OHLCV.csv [data/EUR_USD_Real_Time_OHLCV.csv ...]
+    frames = {os.path.basename(ohlcv_file).replace('_Real_Time_OHLCV.csv', ''): load_bars(ohlcv_file)
+              for ohlcv_file in sys.argv[1:]}
+    results = run_backtests(frames)
+    for symbol, symbol_results in results.groupby('symbol', sort=False):
+        print(symbol)
+        print(symbol_results.drop(columns='symbol').head(10).to_string(index=False))
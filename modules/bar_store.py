@@ -0,0 +1,496 @@
+import json
+import os
+import sys
+import threading
+import time
+from enum import IntEnum
+import numpy as np
+import pandas as pd
+from utils.logging_utils import logging
+from modules.archive import BarArchive
+from utils.storage import StoreLockedError, WriterLock, atomic_write, fsync_file
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# On-disk dtype of every column; 'time' is the epoch-seconds index the store is sorted on.
+# Frames passed around in memory use the same columns and dtypes; see to_csv_frame for the legacy layout.
+COLUMNS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'rsi': np.float64,
+    'macd': np.float64,
+    'macd_signal': np.float64,
+    'macd_hist': np.float64,
+    'stochrsi_K': np.float64,
+    'stochrsi_D': np.float64,
+    'signal': np.int8,
+}
+
+# Column order of the legacy *_Real_Time_OHLCV.csv files
+CSV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'interval',
+               'rsi', 'macd', 'macd_signal', 'macd_hist', 'stochrsi_K', 'stochrsi_D', 'signal']
+
+# Columns the chart draws; changing them on an already-pushed bar invalidates the chart
+CHART_COLUMNS = ['open', 'high', 'low', 'close', 'volume',
+                 'rsi', 'macd', 'macd_signal', 'macd_hist', 'stochrsi_K', 'stochrsi_D']
+
+
+class Signal(IntEnum):
+    """Signal code of a bar, stored as int8."""
+    HOLD = 0
+    OPEN = 1
+    CLOSE = 2
+
+
+# Names used for the signal in the legacy CSV files
+SIGNAL_NAMES = {Signal.HOLD: 'Hold', Signal.OPEN: 'Open Trade', Signal.CLOSE: 'Close Trade'}
+SIGNAL_CODES = {name: code for code, name in SIGNAL_NAMES.items()}
+
+
+def to_epoch(dates):
+    """Convert 'YYYY-MM-DD HH:MM:SS' strings (or datetimes) to int64 epoch seconds."""
+    return pd.to_datetime(pd.Series(dates)).values.astype('datetime64[s]').astype(np.int64)
+
+
+def from_epoch(times):
+    return pd.to_datetime(np.asarray(times, dtype=np.int64), unit='s').strftime(DATE_FORMAT)
+
+
+def to_csv_frame(df, interval=None):
+    """Format a frame of stored bars in the layout of the legacy OHLCV CSV."""
+    csv = df.drop(columns='time').assign(date=from_epoch(df['time']), interval=interval)
+    for column in CHART_COLUMNS:
+        if column not in csv.columns:
+            csv[column] = np.nan
+    signal = df['signal'] if 'signal' in df.columns else pd.Series(Signal.HOLD, index=df.index)
+    csv['signal'] = signal.map(SIGNAL_NAMES).fillna('Hold').values
+    return csv[CSV_COLUMNS]
+
+
+def from_csv_frame(df):
+    """Parse a frame in the legacy OHLCV CSV layout into stored-bar columns and dtypes."""
+    columns = {'time': to_epoch(df['date'])}
+    for column in COLUMNS:
+        if column in ('time', 'signal'):
+            continue
+        if column in df.columns:
+            columns[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            columns[column] = np.full(len(df), np.nan)
+    if 'signal' in df.columns:
+        columns['signal'] = df['signal'].map(SIGNAL_CODES).fillna(Signal.HOLD).to_numpy(dtype=np.int8)
+    else:
+        columns['signal'] = np.zeros(len(df), dtype=np.int8)
+    return pd.DataFrame(columns)
+
+
+def get_bar_store_dir(ohlcv_file):
+    """Return the bar store directory that replaces the given *_Real_Time_OHLCV.csv file."""
+    return ohlcv_file.replace('_Real_Time_OHLCV.csv', '_bars')
+
+
+def get_base_store_dir(ohlcv_file):
+    """Return the directory of the 1-minute bars every interval of the symbol is resampled from."""
+    return ohlcv_file.replace('_Real_Time_OHLCV.csv', '_base_1m')
+
+
+class BarStore:
+    """
+    Append-oriented columnar store for the OHLCV bars of one symbol.
+
+    Each column lives in its own raw binary file that is memory-mapped for reads.
+    Writes only touch the rows from the first changed bar to the end, and go
+    through a small write-ahead tail file so a crash mid-write is replayed on open.
+
+    One process at a time may write (enforced by a lock file); any number of threads and
+    processes may read. A write moves `generation` to an odd number while it rewrites the
+    column files and to the next even number when it commits, and readers retry if the
+    generation they read against has moved, so they get a consistent snapshot without
+    ever blocking the writer.
+
+    Bars older than the hot window can be rolled into compressed day partitions under
+    `archive/<interval>/` (see archive_before); read_history() stitches them back in front of
+    the hot rows. Each interval keeps its own archive, so an interval switch leaves it queryable.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta_file = os.path.join(path, 'meta.json')
+        self.wal_file = os.path.join(path, 'tail.wal')
+        self.lock = threading.RLock()  # Serialises writers within the process
+        self.writer_lock = WriterLock(os.path.join(path, 'writer.lock'))  # Taken on the first write
+        os.makedirs(path, exist_ok=True)
+        self.meta_signature = None
+        self.meta = self._load_meta()
+        self._recover()
+
+    def archive_for(self, interval):
+        """The day-partitioned archive of the bars of one interval."""
+        return BarArchive(os.path.join(self.path, 'archive', interval or 'default'))
+
+    @property
+    def archive(self):
+        return self.archive_for(self.interval)
+
+    def _column_file(self, column):
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_file, 'r') as f:
+                stat = os.fstat(f.fileno())
+                meta = json.load(f)
+        except FileNotFoundError:
+            return {'length': 0, 'interval': None, 'history_version': 0, 'generation': 0}
+        self.meta_signature = (stat.st_ino, stat.st_mtime_ns)
+        meta.setdefault('generation', 0)
+        return meta
+
+    def _save_meta(self, meta):
+        with atomic_write(self.meta_file) as f:
+            json.dump(meta, f)
+        self.meta = meta  # Replaced, never mutated, so reader threads see one version or the other
+
+    def _current_meta(self):
+        """This instance's meta if it is the writer, otherwise the latest one on disk."""
+        if not self.writer_lock.held:
+            try:
+                stat = os.stat(self.meta_file)
+            except FileNotFoundError:
+                return self.meta
+            if (stat.st_ino, stat.st_mtime_ns) != self.meta_signature:
+                self.meta = self._load_meta()
+        return self.meta
+
+    def _recover(self):
+        """Finish a write left unfinished by a crashed writer. Returns False if a live writer holds the store."""
+        if not os.path.exists(self.wal_file) and self.meta['generation'] % 2 == 0:
+            return True
+        with self.lock:
+            held = self.writer_lock.held
+            try:
+                self.writer_lock.acquire()
+            except StoreLockedError:
+                return False
+            try:
+                if os.path.exists(self.wal_file):
+                    logging.info(f"Replaying unfinished write in {self.wal_file}")
+                    self.meta = self._load_meta()
+                    self._replay_wal()
+                elif self.meta['generation'] % 2:
+                    # Odd with no write-ahead file: the writer crashed inside clear()
+                    logging.info(f"Finishing an interrupted clear of {self.path}")
+                    self._finish_clear()
+            finally:
+                if not held:
+                    self.writer_lock.release()
+        return True
+
+    def _acquire_writer(self):
+        if self.writer_lock.held:
+            return
+        self.writer_lock.acquire()
+        # Another process may have written, or crashed mid-write, since this instance last looked
+        self.meta = self._load_meta()
+        self._recover()
+
+    def _committed_meta(self):
+        """Return the meta of a committed (even) generation, waiting out a write in progress."""
+        delay = 0.001
+        while True:
+            meta = self._current_meta()
+            if meta['generation'] % 2 == 0:
+                return meta
+            # An odd generation on disk with no live writer means the writer crashed mid-write
+            if not self.writer_lock.held and self._recover():
+                continue
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def _read_consistent(self, read):
+        """Call read(meta) against one committed generation, retrying if a write commits meanwhile."""
+        while True:
+            meta = self._committed_meta()
+            try:
+                result = read(meta)
+            except (OSError, ValueError):
+                if self._current_meta()['generation'] == meta['generation']:
+                    raise
+                continue
+            if self._current_meta()['generation'] == meta['generation']:
+                return result
+
+    def __len__(self):
+        return self._current_meta()['length']
+
+    @property
+    def interval(self):
+        return self._current_meta().get('interval')
+
+    @property
+    def history_version(self):
+        """Bumped whenever a bar before the newest one changes or the store is cleared."""
+        return self._current_meta().get('history_version', 0)
+
+    @property
+    def generation(self):
+        """Even once a write has committed; two higher after every write."""
+        return self._current_meta()['generation']
+
+    def position(self, time):
+        """Return the row position of the first bar at or after the given epoch time."""
+        def search(meta):
+            if meta['length'] == 0:
+                return 0
+            times = np.memmap(self._column_file('time'), dtype=np.int64, mode='r', shape=(meta['length'],))
+            return int(np.searchsorted(times, time, side='left'))
+        return self._read_consistent(search)
+
+    def _column(self, column, start, stop, length):
+        stop = length if stop is None else min(stop, length)
+        if start >= stop:
+            return np.empty(0, dtype=COLUMNS[column])
+        values = np.memmap(self._column_file(column), dtype=COLUMNS[column], mode='r', shape=(length,))
+        return np.array(values[start:stop])
+
+    def times(self, start=0, stop=None):
+        return self._read_consistent(lambda meta: self._column('time', start, stop, meta['length']))
+
+    def last_time(self):
+        """Return the epoch time of the newest bar, or None if the store is empty."""
+        def last(meta):
+            if meta['length'] == 0:
+                return None
+            return int(self._column('time', meta['length'] - 1, None, meta['length'])[0])
+        return self._read_consistent(last)
+
+    def read(self, start=0, stop=None):
+        """Return rows [start, stop) of one committed snapshot as a DataFrame of the COLUMNS."""
+        def read_columns(meta):
+            length = meta['length']
+            first = max(length + start, 0) if start < 0 else start
+            return {column: self._column(column, first, stop, length) for column in COLUMNS}
+
+        return pd.DataFrame(self._read_consistent(read_columns))
+
+    def read_history(self, start_time=None, end_time=None):
+        """Return archived and hot bars with epoch times in [start_time, end_time) as one DataFrame."""
+        def read_columns(meta):
+            length = meta['length']
+            times = self._column('time', 0, None, length)
+            first = 0 if start_time is None else int(np.searchsorted(times, start_time, side='left'))
+            stop = length if end_time is None else int(np.searchsorted(times, end_time, side='left'))
+            return {column: self._column(column, first, stop, length) for column in COLUMNS}
+
+        columns = self._read_consistent(read_columns)
+        hot_start = int(columns['time'][0]) if len(columns['time']) else end_time
+        archived = self.archive.read(start_time, hot_start)
+        if archived is not None:
+            columns = {column: np.concatenate([archived[column].astype(dtype), columns[column]])
+                       for column, dtype in COLUMNS.items()}
+        return pd.DataFrame(columns)
+
+    def tail(self, n):
+        return self.read(start=-n)
+
+    def _frame_to_columns(self, df):
+        columns = {}
+        for column, dtype in COLUMNS.items():
+            if column in df.columns:
+                columns[column] = df[column].to_numpy(dtype=dtype)
+            elif column == 'signal':
+                columns[column] = np.zeros(len(df), dtype=dtype)
+            else:
+                columns[column] = np.full(len(df), np.nan)
+        return columns
+
+    def upsert(self, df, interval=None):
+        """
+        Insert or replace bars by timestamp. Only rows from the oldest incoming bar onward
+        are rewritten, so appending the newest bars costs O(new bars).
+        Returns the position of the first row that changed.
+        """
+        with self.lock:
+            self._acquire_writer()
+            return self._upsert(df, interval)
+
+    def _upsert(self, df, interval):
+        if interval is not None and self.interval not in (None, interval):
+            logging.info(f"Interval changed from {self.interval} to {interval}, clearing {self.path}")
+            self._clear()
+        if df.empty:
+            return len(self)
+
+        incoming = self._frame_to_columns(df)
+        start = int(np.searchsorted(self.times(), incoming['time'].min(), side='left'))
+
+        # Merge the incoming rows over the stored tail they overlap, newest write wins
+        length = len(self)
+        stored = {column: self._column(column, start, None, length) for column in COLUMNS}
+        merged = {column: np.concatenate([stored[column], incoming[column]]) for column in COLUMNS}
+        _, last = np.unique(merged['time'][::-1], return_index=True)
+        keep = len(merged['time']) - 1 - last  # unique() sorts by time; keep the last occurrence
+        block = {column: values[keep] for column, values in merged.items()}
+
+        history_version = self.history_version
+        if self._rewrites_history(start, stored, block):
+            history_version += 1
+
+        self._write_wal(start, block, interval, history_version)
+        self._apply(start, block, interval, history_version)
+        return start
+
+    def _rewrites_history(self, start, stored, block):
+        # Every stored row before the newest one must come back unchanged
+        settled = len(stored['time']) - 1
+        if settled <= 0:
+            return False
+        if len(block['time']) < settled or not np.array_equal(stored['time'][:settled], block['time'][:settled]):
+            return True
+        return any(not np.array_equal(stored[column][:settled], block[column][:settled], equal_nan=True)
+                   for column in CHART_COLUMNS)
+
+    def _write_wal(self, start, block, interval, history_version):
+        # Binary, so large blocks are not pushed through a text encoder
+        with atomic_write(self.wal_file, 'wb') as f:
+            np.savez(f, start=start, interval=interval or '', history_version=history_version, **block)
+
+    def _replay_wal(self):
+        with open(self.wal_file, 'rb') as f:
+            legacy = f.read(1) == b'{'
+        if legacy:
+            # JSON tail written by older versions
+            with open(self.wal_file, 'r') as f:
+                entry = json.load(f)
+            block = {column: np.asarray(values, dtype=COLUMNS[column]) for column, values in entry['columns'].items()}
+            self._apply(entry['start'], block, entry['interval'], entry['history_version'])
+            return
+        with np.load(self.wal_file) as entry:
+            block = {column: entry[column] for column in COLUMNS}
+            start, interval, history_version = int(entry['start']), str(entry['interval']) or None, int(entry['history_version'])
+        self._apply(start, block, interval, history_version)
+
+    def _apply(self, start, block, interval, history_version):
+        # Odd while the column files are rewritten; already odd when replaying a crashed write
+        generation = self.meta['generation'] | 1
+        if generation != self.meta['generation']:
+            self._save_meta(dict(self.meta, generation=generation))
+        for column, dtype in COLUMNS.items():
+            itemsize = np.dtype(dtype).itemsize
+            column_file = self._column_file(column)
+            # Overwritten in place, never truncated, so a reader's memory map cannot lose its pages
+            with open(column_file, 'r+b' if os.path.exists(column_file) else 'wb') as f:
+                f.seek(start * itemsize)
+                f.write(np.ascontiguousarray(block[column], dtype=dtype).tobytes())
+                fsync_file(f)
+        meta = dict(self.meta, length=start + len(block['time']), history_version=history_version,
+                    generation=generation + 1)
+        if interval is not None:
+            meta['interval'] = interval
+        self._save_meta(meta)
+        os.remove(self.wal_file)
+
+    def archive_before(self, cutoff):
+        """
+        Move the bars older than epoch time `cutoff` into the archive and compact the rest to
+        the front of the store. The partitions are written before the compaction, which goes
+        through the write-ahead file like any write, so a crash at any point loses no bar.
+        Returns the number of rows removed; row positions shift down by that much.
+        """
+        with self.lock:
+            self._acquire_writer()
+            length = len(self)
+            removed = self.position(cutoff)
+            if removed == 0:
+                return 0
+            self.archive.write({column: self._column(column, 0, removed, length) for column in COLUMNS})
+            block = {column: self._column(column, removed, None, length) for column in COLUMNS}
+            history_version = self.history_version + 1
+            self._write_wal(0, block, None, history_version)
+            self._apply(0, block, None, history_version)
+            return removed
+
+    def clear(self):
+        with self.lock:
+            self._acquire_writer()
+            self._clear()
+
+    def _clear(self):
+        self._save_meta(dict(self.meta, generation=self.meta['generation'] | 1))
+        self._finish_clear()
+
+    def _finish_clear(self):
+        # Idempotent, so _recover can rerun it after a crash anywhere past the odd generation
+        for column in COLUMNS:
+            if os.path.exists(self._column_file(column)):
+                os.remove(self._column_file(column))
+        self._save_meta({'length': 0, 'interval': None, 'history_version': self.meta['history_version'] + 1,
+                         'generation': self.meta['generation'] + 1})
+
+    def close(self):
+        """Give up the writer lock so another process can write the store."""
+        with self.lock:
+            self.writer_lock.release()
+
+    def import_csv(self, csv_file):
+        """Load a legacy *_Real_Time_OHLCV.csv into the store."""
+        df = pd.read_csv(csv_file)
+        interval = df['interval'].iloc[0] if len(df) and 'interval' in df.columns else None
+        self.upsert(from_csv_frame(df), interval)
+        logging.info(f"Imported {len(df)} bars from {csv_file} into {self.path}")
+
+    def export_csv(self, csv_file, start_time=None, end_time=None):
+        """Write the archived and hot bars out in the legacy *_Real_Time_OHLCV.csv format."""
+        df = self.read_history(start_time, end_time)
+        to_csv_frame(df, self.interval).to_csv(csv_file, index=False)
+        logging.info(f"Exported {len(df)} bars from {self.path} to {csv_file}")
+
+
+_open_stores = {}
+_open_stores_lock = threading.Lock()
+
+
+def open_bar_store(ohlcv_file):
+    """
+    Open the bar store for an OHLCV file, migrating the legacy CSV on first use.
+    The fetcher and chart threads of a process share one instance per store.
+    """
+    path = get_bar_store_dir(ohlcv_file)
+    with _open_stores_lock:
+        store = _open_stores.get(path)
+        if store is None:
+            store = BarStore(path)
+            if len(store) == 0 and os.path.exists(ohlcv_file):
+                store.import_csv(ohlcv_file)
+            _open_stores[path] = store
+    return store
+
+
+def open_base_store(ohlcv_file):
+    """
+    Open the 1-minute base store of a symbol, shared like open_bar_store. A new base store
+    is seeded from the interval store when that already holds 1m bars, so upgrading does not refetch.
+    """
+    path = get_base_store_dir(ohlcv_file)
+    with _open_stores_lock:
+        store = _open_stores.get(path)
+        created = store is None
+        if created:
+            store = _open_stores[path] = BarStore(path)
+    if created and len(store) == 0:
+        bar_store = open_bar_store(ohlcv_file)
+        if len(bar_store) and bar_store.interval == '1m':
+            store.upsert(bar_store.read()[['time', 'open', 'high', 'low', 'close', 'volume']], interval='1m')
+            logging.info(f"Seeded {path} with {len(store)} stored 1m bars")
+    return store
+
+
+if __name__ == '__main__':
+    # Usage: python -m modules.bar_store data/BTC_USD_Real_Time_OHLCV.csv [export.csv]
+    ohlcv_file = sys.argv[1]
+    export_file = sys.argv[2] if len(sys.argv) > 2 else ohlcv_file
+    open_bar_store(ohlcv_file).export_csv(export_file)
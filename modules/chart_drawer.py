@@ -1,15 +1,24 @@
 import pandas as pd
 from lightweight_charts import Chart
 from utils.logging_utils import logging
-import time
+from indicators.registry import IndicatorGraph, strategy_requests
+from modules.bar_store import open_bar_store
+from modules.event_bus import event_bus, bars_topic, markers_topic
+from utils.metrics import metrics, metrics_label
 from functools import partial
-import json
-import os
+
+# Share of the window the price chart keeps when indicator panes sit below it
+MAIN_CHART_HEIGHT = 0.4
+
+def pane_height(pane_count):
+    """Height of each indicator pane when they split the space under the price chart."""
+    return (1 - MAIN_CHART_HEIGHT) / max(pane_count, 1)
+
 def on_max(target_chart, charts):
     button = target_chart.topbar['max']
     if button.value == '×':
         for c in charts:
-            width, height = (1, 0.4) if c == charts[0] else (1, 0.2)
+            width, height = (1, MAIN_CHART_HEIGHT) if c == charts[0] else (1, pane_height(len(charts) - 1))
             c.resize(width, height)
         button.set('■')
     else:
@@ -18,28 +27,48 @@ def on_max(target_chart, charts):
             c.resize(width, height)
         button.set('×')
 
+def chart_frame(df):
+    """Bars with the epoch 'time' column turned into the datetimes the chart expects."""
+    return df.assign(date=pd.to_datetime(df['time'], unit='s'))
+
+def set_chart_data(chart, series, df):
+    """Send the full history to the main chart and every indicator series ((line, column, name) triples)."""
+    df = chart_frame(df)
+    chart.set(df[['date', 'open', 'high', 'low', 'close', 'volume']])
+    for line, column, name in series:
+        line.set(df[['date', column]].rename(columns={column: name}))
+
+def update_chart_data(chart, series, df):
+    """Push only the given bars (the revised last bar and any new ones) with incremental updates."""
+    for _, bar in chart_frame(df).iterrows():
+        chart.update(bar[['date', 'open', 'high', 'low', 'close', 'volume']])
+        for line, column, name in series:
+            line.update(bar[['date', column]].rename({column: name}))
+
+def create_series(target, kind, name, color):
+    if kind == 'histogram':
+        return target.create_histogram(name)
+    return target.create_line(name=name, color=color)
+
 def draw_chart(title, ohlcv_file):
     logging.info("Initializing chart...")
-    chart = Chart(inner_width=1, inner_height=0.4)
+    chart = Chart(inner_width=1, inner_height=MAIN_CHART_HEIGHT)
     chart.legend(visible=True)
     chart.topbar.textbox('symbol', title)  # Use the dynamic title
 
-    rsi_chart = chart.create_subchart(width=1, height=0.2)
-    rsi_chart.topbar.textbox('symbol', 'RSI')
-    rsi_line = rsi_chart.create_line(name='RSI', color="rgb(126, 87, 194)")
-
-    macd_chart = chart.create_subchart(width=1, height=0.2)
-    macd_chart.topbar.textbox('symbol', 'MACD')
-    macd_line = macd_chart.create_line(name='MACD', color="rgb(41, 98, 255)")
-    macd_signal_line = macd_chart.create_line(name='MACD Signal', color="rgb(255, 109, 0)")
-    macd_histogram_series = macd_chart.create_histogram('MACD Histogram')    
-
-    stochrsi_chart = chart.create_subchart(width=1, height=0.2)
-    stochrsi_chart.topbar.textbox('symbol', 'StochRSI')
-    stochrsi_k_line = stochrsi_chart.create_line(name='StochRSI %K', color="rgb(255,255,255)")
-    stochrsi_d_line = stochrsi_chart.create_line(name='StochRSI %D', color="rgb(255,0,255)")
-
-    charts = [chart, rsi_chart, macd_chart, stochrsi_chart]
+    # One subchart per indicator pane the registry describes; pane-less indicators overlay the price chart
+    panes = IndicatorGraph(strategy_requests()).chart_panes()
+    height = pane_height(sum(pane is not None for pane, _ in panes))
+    charts = [chart]
+    series = []
+    for pane, pane_series in panes:
+        target = chart
+        if pane is not None:
+            target = chart.create_subchart(width=1, height=height)
+            target.topbar.textbox('symbol', pane)
+            charts.append(target)
+        for column, name, kind, color in pane_series:
+            series.append((create_series(target, kind, name, color), column, name))
 
     for i, c in enumerate(charts):
         chart_number = str(i + 1)
@@ -47,99 +76,67 @@ def draw_chart(title, ohlcv_file):
 
     # Load and set data as before
     try:
-        logging.info(f"Loading data from {ohlcv_file}...")
-        df = pd.read_csv(ohlcv_file)
+        bar_store = open_bar_store(ohlcv_file)
+        logging.info(f"Loading data from {bar_store.path}...")
+        df = bar_store.read()
         if df.empty:
-            logging.warning(f"No data found in {ohlcv_file}. Chart might not render.")
+            logging.warning(f"No data found in {bar_store.path}. Chart might not render.")
         else:
-            chart.set(df[['date', 'open', 'high', 'low', 'close', 'volume']])
-
-            rsi_data = df[['date', 'rsi']].rename(columns={'rsi': 'RSI'})
-            rsi_line.set(rsi_data)
-
-            macd_data = df[['date', 'macd']].rename(columns={'macd': 'MACD'})
-            macd_line.set(macd_data)
-
-            macd_signal_data = df[['date', 'macd_signal']].rename(columns={'macd_signal': 'MACD Signal'})
-            macd_signal_line.set(macd_signal_data)
-
-            macd_histogram_data = df[['date', 'macd_hist']].rename(columns={'macd_hist': 'MACD Histogram'})
-            macd_histogram_series.set(macd_histogram_data)
-
-            stochrsi_k_data = df[['date', 'stochrsi_K']].rename(columns={'stochrsi_K': 'StochRSI %K'})
-            stochrsi_k_line.set(stochrsi_k_data)
-
-            stochrsi_d_data = df[['date', 'stochrsi_D']].rename(columns={'stochrsi_D': 'StochRSI %D'})
-            stochrsi_d_line.set(stochrsi_d_data)
+            set_chart_data(chart, series, df)
 
         logging.info("Chart initialized successfully.")
 
     except FileNotFoundError:
         logging.error(f"{ohlcv_file} not found. Please ensure data fetching is working correctly.")
 
-    return chart, rsi_line, macd_line, macd_signal_line, macd_histogram_series, stochrsi_k_line, stochrsi_d_line
-
-def update_chart_and_indicators(chart, rsi_line, macd_line, macd_signal_line, macd_histogram_series, stochrsi_k_line, stochrsi_d_line, ohlcv_file):
-    def check_config_change():
-        flag_file = os.path.join('config', f'{os.path.basename(ohlcv_file).split("_")[0]}{os.path.basename(ohlcv_file).split("_")[1]}_config_changed.flag')
-        if os.path.exists(flag_file):
-            print("Config changed")
-            return True
-        return False
-    
-    # Load the strategy config to get the interval
-    with open(os.path.join('config', 'strategy_config.json'), 'r') as f:
-        config = json.load(f)
-    
-    # Get update interval from config
-    interval_map = {
-        "1m": 60,    # 60 seconds for 1-minute interval
-        "5m": 300,   # 300 seconds for 5-minute interval
-        "1h": 3600   # 3600 seconds for 1-hour interval
-    }
-    interval = interval_map.get(config.get('interval', '1m'), 60)
+    return chart, series
+
+def update_chart_and_indicators(chart, series, ohlcv_file):
+    bar_store = open_bar_store(ohlcv_file)
+    last_pushed_time = None
+    history_version = None
+    label = metrics_label(ohlcv_file)
+    # An interval change clears the store, which bumps history_version and forces a full redraw
+    subscription = event_bus.subscribe(bars_topic(ohlcv_file), markers_topic(ohlcv_file))
 
     while True:
         try:
-            # Check for config changes
-            if check_config_change():
-                with open(os.path.join('config', 'strategy_config.json'), 'r') as f:
-                    new_config = json.load(f)
-                if new_config.get('interval') != config.get('interval'):
-                    config = new_config
-                    interval = interval_map.get(config.get('interval', '1m'), 60)
-                    logging.info(f"Chart update interval changed to {interval} seconds")
-
-            df = pd.read_csv(ohlcv_file)
-            
-            # Update main chart
-            chart.set(df[['date', 'open', 'high', 'low', 'close', 'volume']])
-
-            # Update RSI
-            rsi_data = df[['date', 'rsi']].rename(columns={'rsi': 'RSI'})
-            rsi_line.set(rsi_data)
-
-            # Update MACD
-            macd_data = df[['date', 'macd']].rename(columns={'macd': 'MACD'})
-            macd_line.set(macd_data)
-
-            macd_signal_data = df[['date', 'macd_signal']].rename(columns={'macd_signal': 'MACD Signal'})
-            macd_signal_line.set(macd_signal_data)
-
-            macd_histogram_data = df[['date', 'macd_hist']].rename(columns={'macd_hist': 'MACD Histogram'})
-            macd_histogram_series.set(macd_histogram_data)
-
-            # Update StochRSI
-            stochrsi_k_data = df[['date', 'stochrsi_K']].rename(columns={'stochrsi_K': 'StochRSI %K'})
-            stochrsi_k_line.set(stochrsi_k_data)
-
-            stochrsi_d_data = df[['date', 'stochrsi_D']].rename(columns={'stochrsi_D': 'StochRSI %D'})
-            stochrsi_d_line.set(stochrsi_d_data)
-
-            logging.info(f"Chart updated successfully for {config.get('interval', '1m')} interval.")
+            # Sleep until the fetcher publishes bars or markers
+            events = [subscription.get()]
+            while not subscription.empty():
+                events.append(subscription.get_nowait())
+
+            bar_events = [event for topic, event in events if topic == bars_topic(ohlcv_file)]
+            if bar_events and (history_version != bar_events[-1]['history_version'] or last_pushed_time is None):
+                # First run, interval change or rewritten history: resend everything once
+                history_version = bar_events[-1]['history_version']
+                with metrics.timer(label, 'chart_set'):
+                    df = bar_store.read()
+                    set_chart_data(chart, series, df)
+                if not df.empty:
+                    last_pushed_time = int(df['time'].iloc[-1])
+            else:
+                for event in bar_events:
+                    # Re-push the last sent bar (it may have been revised) and anything newer
+                    df = event['bars']
+                    times = df['time'].to_numpy()
+                    df = df[times >= last_pushed_time]
+                    if not df.empty:
+                        with metrics.timer(label, 'chart_update'):
+                            update_chart_data(chart, series, df)
+                        metrics.count(label, 'chart_bars_pushed', len(df))
+                        last_pushed_time = int(times.max())
+
+            marker_events = [event for topic, event in events if topic == markers_topic(ohlcv_file)]
+            if marker_events:
+                with metrics.timer(label, 'chart_markers'):
+                    for event in marker_events:
+                        chart.marker(**dict(event, time=pd.to_datetime(event['time'], unit='s')))
+
+            if bar_events:
+                logging.info(f"Chart updated successfully for {bar_store.interval} interval.")
 
-            
         except Exception as e:
             logging.error(f"Error updating chart: {e}")
+            metrics.count(label, 'chart_errors')
 
-        time.sleep(interval)
\ No newline at end of file
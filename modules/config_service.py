@@ -0,0 +1,163 @@
+import json
+import os
+import queue
+import threading
+import time
+from modules.event_bus import event_bus
+from utils.logging_utils import logging
+from utils.storage import atomic_write
+
+# Strategy parameters that feed the indicators (everything else only affects signals or fetching)
+INDICATOR_PARAMS = ['rsi_period', 'stochrsi_period', 'macd_fast_period', 'macd_slow_period', 'macd_signal_period']
+
+# Strategy config written when there is none yet; tune it with `python -m modules.optimizer`
+DEFAULT_CONFIG = {
+    "take_profit": 2.0,
+    "stop_loss": 1.0,
+    "interval": "1m",
+    "rsi_period": 14,
+    "stochrsi_period": 14,
+    "macd_fast_period": 12,
+    "macd_slow_period": 26,
+    "macd_signal_period": 9,
+    "rsi_overbought": 70,
+    "rsi_oversold": 30,
+    "stochrsi_overbought": 80,
+    "stochrsi_oversold": 20,
+}
+
+
+def config_topic(config_file):
+    """Topic carrying ConfigChange events for one config file."""
+    return f"{os.path.abspath(config_file)}:config"
+
+
+class ConfigChange:
+    """Typed diff between two versions of the strategy config."""
+
+    __slots__ = ('old', 'new', 'changed')
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.changed = {key: (old.get(key), new.get(key)) for key in sorted(set(old) | set(new))
+                        if old.get(key) != new.get(key)}
+
+    def __bool__(self):
+        return bool(self.changed)
+
+    def __repr__(self):
+        return f"ConfigChange({self.changed})"
+
+    @property
+    def interval(self):
+        """The new interval, or None if it did not change."""
+        return self.new.get('interval', '1m') if 'interval' in self.changed else None
+
+    @property
+    def indicator_params(self):
+        """{param: new value} for the indicator periods that changed."""
+        return {key: self.new[key] for key in INDICATOR_PARAMS if key in self.changed and key in self.new}
+
+
+class ConfigService:
+    """
+    Watches one config file from a single thread and publishes a ConfigChange on the
+    event bus whenever its contents change. Readers use `config` instead of re-reading
+    the file, and subscribers are woken by the bus instead of polling.
+    """
+
+    def __init__(self, config_file, poll_interval=1.0, bus=event_bus):
+        self.config_file = config_file
+        self.poll_interval = poll_interval
+        self.bus = bus
+        self.topic = config_topic(config_file)
+        self.lock = threading.Lock()
+        self.signature = self._signature()
+        self.config = self._load()
+        self.thread = None
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        with open(self.config_file, 'r') as f:
+            return json.load(f)
+
+    def check(self):
+        """Reload the file if it changed on disk; publishes and returns the ConfigChange, or None."""
+        signature = self._signature()
+        if signature is None or signature == self.signature:
+            return None
+        try:
+            new_config = self._load()
+        except (OSError, ValueError) as e:
+            # Probably caught mid-write; the next check will see the finished file
+            logging.warning(f"Could not reload {self.config_file}: {e}")
+            return None
+        with self.lock:
+            self.signature = signature
+            change = ConfigChange(self.config, new_config)
+            self.config = new_config
+        if change:
+            logging.info(f"{self.config_file} changed: {change.changed}")
+            self.bus.publish(self.topic, change)
+            return change
+        return None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Error watching {self.config_file}: {e}")
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._watch, name='config-watcher', daemon=True)
+            self.thread.start()
+        return self
+
+    def subscribe(self):
+        """Return a bus subscription that receives (topic, ConfigChange) tuples."""
+        return self.bus.subscribe(self.topic)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(config_file):
+    """Return the process-wide watcher for a config file, starting it on first use."""
+    path = os.path.abspath(config_file)
+    with _services_lock:
+        service = _services.get(path)
+        if service is None:
+            service = _services[path] = ConfigService(config_file).start()
+    return service
+
+
+def wait_for_changes(subscription, timeout=0):
+    """
+    Return the ConfigChanges waiting in a subscription. With a timeout, block up to that
+    many seconds for the first one, so a polling loop can use this as its sleep.
+    """
+    events = []
+    try:
+        events.append(subscription.get(timeout=timeout) if timeout else subscription.get_nowait())
+    except queue.Empty:
+        return []
+    while not subscription.empty():
+        events.append(subscription.get_nowait())
+    return [change for _, change in events]
+
+
+def save_config(config_file, config):
+    """Write the config atomically, so the watcher never reads a half-written file."""
+    with atomic_write(config_file) as f:
+        json.dump(config, f, indent=2)
@@ -1,111 +1,246 @@
-import time
 import logging
-import pandas as pd
 from threading import Thread
-from tvDatafeed import TvDatafeedLive, Interval as TVInterval
+import numpy as np
+import pandas as pd
 from utils.trading_strategy import TradingStrategy
-import json
+from modules.bar_store import open_bar_store, open_base_store, to_epoch
+from modules.resampler import Resampler, BASE_INTERVAL, interval_seconds
+from modules.retention import apply_retention, hot_bars, warmup_bars
+from modules.event_bus import event_bus, bars_topic, markers_topic, MarkerPublisher
+from modules.session_manager import get_session_manager
+from modules.fetch_planner import FetchPlanner
+from modules.config_service import get_config_service, wait_for_changes
+from utils.metrics import metrics, metrics_label
 import os
-username = 'jazibmemon12'
-password = 'jazib@123456789000'
 
-# Initialize the TradingView API for fetching data
-tvl = TvDatafeedLive(username, password)
+# Shared TradingView session (pooled, with backoff and a circuit breaker)
+tvl = get_session_manager()
+
+# tvDatafeed returns at most this many bars per get_hist request
+MAX_FEED_BARS = 5000
+
+# Polling period of each supported interval; anything else runs as 1m
+POLL_SECONDS = {'1m': 60, '5m': 300, '1h': 3600}
+
+def get_indicator_state_file(ohlcv_file):
+    """Return the path of the streaming indicator state saved next to the OHLCV file."""
+    return ohlcv_file.replace('_Real_Time_OHLCV.csv', '_indicator_state.json')
+
+def apply_config_change(strategy, bar_store, change, ohlcv_file):
+    """
+    Apply a ConfigChange to a running symbol without dropping its open trades.
+    Changed indicator periods are recomputed over the stored bars for just those
+    indicators. Returns True if the stored bars were reset (interval change); they are
+    then rebuilt from the 1-minute base store on the next tick, without a refetch.
+    """
+    if change.interval is not None:
+        logging.info(f"Interval changed from {change.old.get('interval')} to {change.interval}")
+        strategy.apply_config(change.new)
+        strategy.indicator_engine = None
+        reset_symbol_data(bar_store, ohlcv_file)
+        logging.info(f"Rebuilding {change.interval} bars from the stored 1m bars")
+        return True
+
+    df = bar_store.read() if change.indicator_params and strategy.indicator_engine is not None else None
+    recomputed = strategy.apply_config(change.new, None if df is None else df['close'].tolist())
+    if recomputed:
+        for column, values in recomputed.items():
+            df[column] = values
+        df = df.fillna(0)
+        bar_store.upsert(df)
+        strategy.save_indicator_state(get_indicator_state_file(ohlcv_file))
+        event_bus.publish(bars_topic(ohlcv_file), {'bars': df, 'history_version': bar_store.history_version})
+        logging.info(f"Recomputed {sorted(recomputed)} over {len(df)} stored bars")
+    return False
+
+def get_feed_interval(interval=BASE_INTERVAL):
+    """
+    Return the feed's value for an interval (1m by default: every configured interval is
+    resampled from it). The offline FakeFeed takes the plain interval string, so it runs
+    without tvDatafeed installed.
+    """
+    if os.environ.get('STOCK_AI_FEED') == 'fake':
+        return interval
+    from tvDatafeed import Interval as TVInterval  # Imported by the fetch thread, not at startup
+    return {'1m': TVInterval.in_1_minute, '5m': TVInterval.in_5_minute, '1h': TVInterval.in_1_hour}[interval]
+
+def get_interval_settings(config, strategy):
+    """
+    Return the polling period in seconds, the number of 1m bars a full backfill requests and
+    the number of bars of the configured interval to seed at their native interval (0 if none).
+    The backfill covers the strategy's indicator warm-up; when that takes more 1m bars than one
+    request returns, it is capped and the warm-up is seeded with one native-interval request.
+    """
+    interval = config.get('interval', '1m')
+    if interval not in POLL_SECONDS:
+        interval = '1m'
+    warmup = warmup_bars(strategy)
+    base_bars = warmup * interval_seconds(interval) // interval_seconds(BASE_INTERVAL)
+    if base_bars <= MAX_FEED_BARS:
+        return POLL_SECONDS[interval], base_bars, 0
+    return POLL_SECONDS[interval], MAX_FEED_BARS, warmup
+
+def fetch_seed_bars(symbol, exchange, interval, n_bars):
+    """Fetch the last n_bars at the native `interval`, for the warm-up the 1m backfill cannot reach."""
+    data = tvl.get_hist(symbol, exchange, interval=get_feed_interval(interval), n_bars=n_bars,
+                        fut_contract=None, extended_session=False, timeout=-1)
+    if data is None:
+        raise Exception(f"Failed to fetch {interval} seed bars")
+    return prepare_bars(data)
+
+def prepare_bars(data):
+    """Normalise a get_hist frame to the time/OHLCV columns of the bar store."""
+    return pd.DataFrame({
+        'time': to_epoch(data.index),
+        'open': data['open'].to_numpy(dtype=np.float64),
+        'high': data['high'].to_numpy(dtype=np.float64),
+        'low': data['low'].to_numpy(dtype=np.float64),
+        'close': data['close'].to_numpy(dtype=np.float64),
+        'volume': data['volume'].to_numpy(dtype=np.float64),
+    })
+
+def process_bars(strategy, bar_store, new_data, markers, ohlcv_file, signal_system_file, current_interval, last_processed_index):
+    """
+    Run one tick for freshly fetched bars: stream indicators, upsert the store,
+    publish the delta and generate signals. Returns the new last processed index.
+    """
+    label = metrics_label(ohlcv_file)
+    metrics.count(label, 'bars_fetched', len(new_data))
+
+    # Stream only the bars the strategy has not seen yet through the indicator engine
+    with metrics.timer(label, 'indicators'):
+        new_data = strategy.update_indicators(new_data)
+
+    # Upsert only the new/revised bars into the columnar bar store
+    try:
+        new_data = new_data.fillna(0)
+        with metrics.timer(label, 'store_write'):
+            bar_store.upsert(new_data, interval=current_interval)
+            strategy.save_indicator_state(get_indicator_state_file(ohlcv_file))
+        # Hand the delta straight to the chart thread instead of having it re-read the store
+        event_bus.publish(bars_topic(ohlcv_file), {'bars': new_data, 'history_version': bar_store.history_version})
+        logging.info(f"Data updated successfully for {current_interval} interval")
+    except Exception as e:
+        logging.error(f"Error updating bar store: {e}")
+        metrics.count(label, 'store_errors')
+        strategy.indicator_engine = None  # Re-warm from a full fetch on the next tick
+        raise
+
+    # Generate signals on the bars after the last processed one. A rebuilt history (interval
+    # switch) resumes after the newest bar the strategy has already seen, so old bars are never
+    # replayed against open positions or turned into retroactive trades
+    if last_processed_index is not None:
+        start = last_processed_index + 1
+    elif strategy.last_signal_time is not None:
+        start = bar_store.position(strategy.last_signal_time + 1)
+    else:
+        start = 0
+    with metrics.timer(label, 'store_read'):
+        updated_data = bar_store.read(start=start)
+    with metrics.timer(label, 'signals'):
+        return start + strategy.generate_signals(updated_data, markers, signal_system_file, bar_store)
+
+def process_base_bars(strategy, bar_store, resampler, base_data, markers, ohlcv_file, signal_system_file,
+                      current_interval, last_processed_index, seed=None):
+    """
+    Store freshly fetched 1m bars (if any) in the base store and run the tick on the
+    `current_interval` bars they touched. While the indicators are cold (start-up or an
+    interval switch) the hot window of interval bars is rebuilt from the base store instead,
+    with `seed` (native-interval bars, see fetch_seed_bars) in front of what the 1m bars cover.
+    Days that left the hot window are then archived (see modules.retention).
+    """
+    with metrics.timer(metrics_label(ohlcv_file), 'resample'):
+        since = resampler.update(base_data)
+        if strategy.indicator_engine is None:
+            new_data = resampler.rebuild(current_interval, hot_bars(strategy), seed)
+        elif since is None:
+            return last_processed_index
+        else:
+            new_data = resampler.resample(current_interval, since)
+    if new_data.empty:
+        return last_processed_index
+    last_processed_index = process_bars(strategy, bar_store, new_data, markers, ohlcv_file, signal_system_file,
+                                        current_interval, last_processed_index)
+    with metrics.timer(metrics_label(ohlcv_file), 'retention'):
+        return apply_retention(strategy, bar_store, resampler.base_store, signal_system_file,
+                               current_interval, last_processed_index)
+
+def reset_symbol_data(bar_store, ohlcv_file):
+    """Drop the stored bars and indicator state of a symbol, e.g. after an interval change."""
+    bar_store.clear()
+    indicator_state_file = get_indicator_state_file(ohlcv_file)
+    if os.path.exists(indicator_state_file):
+        os.remove(indicator_state_file)
 
 def fetch_and_update_data(chart, ohlcv_file, signal_system_file, symbol, exchange, strategy_config_file):
     last_processed_index = None
-    global tvl
-    
-    def check_config_change():
-        flag_file = os.path.join('config', f'{os.path.basename(ohlcv_file).split("_")[0]}{os.path.basename(ohlcv_file).split("_")[1]}_config_changed.flag')
-        if os.path.exists(flag_file):
-            print("Config changed")
-            os.remove(flag_file)  # Remove the flag     
-            return True
-        return False
-    
-    def get_current_config():
-        with open(strategy_config_file, 'r') as f:
-            return json.load(f)
-    
-    def get_interval_settings(config):
-        interval_map = {
-            "1m": (TVInterval.in_1_minute, 60, 240),
-            "5m": (TVInterval.in_5_minute, 300, 48),
-            "1h": (TVInterval.in_1_hour, 3600, 24)
-        }
-        selected_interval = config.get('interval', '1m')
-        return interval_map.get(selected_interval, interval_map['1m'])
-
-    # Initial config load
-    config = get_current_config()
-    interval, sleep_time, n_bars = get_interval_settings(config)
+    indicator_state_file = get_indicator_state_file(ohlcv_file)
+    bar_store = open_bar_store(ohlcv_file)
+    resampler = Resampler(open_base_store(ohlcv_file))
+    # Signal markers are drawn by the chart thread, which owns the webview
+    markers = MarkerPublisher(event_bus, markers_topic(ohlcv_file))
+    planner = FetchPlanner()
+    label = metrics_label(ohlcv_file)
+
+    # Config changes arrive from the watcher thread
+    config_service = get_config_service(strategy_config_file)
+    config_updates = config_service.subscribe()
+    config = config_service.config
     current_interval = config.get('interval', '1m')  # Track current interval
 
     # Initialize the trading strategy
     strategy = TradingStrategy(config_file=strategy_config_file)
+    sleep_time, n_bars, seed_bars = get_interval_settings(config, strategy)
+    # Resume the indicator state only if it belongs to the stored history
+    if len(bar_store) and strategy.load_indicator_state(indicator_state_file):
+        logging.info(f"Resumed indicator state from {indicator_state_file}")
 
+    changes = []
     while True:
         try:
-            if check_config_change():
-                new_config = get_current_config()
-                if new_config.get('interval') != config.get('interval'):
-                    logging.info(f"Interval changed from {config.get('interval')} to {new_config.get('interval')}")
-                    config = new_config
-                    interval, sleep_time, n_bars = get_interval_settings(config)
-                    strategy = TradingStrategy(config_file=strategy_config_file)
-                    current_interval = new_config.get('interval', '1m')  # Update current interval
-                    # Clear existing data when interval changes
-                    if os.path.exists(ohlcv_file):
-                        os.remove(ohlcv_file)
-                        logging.info(f"Cleared existing data due to interval change to {current_interval}")
-
-            # Fetch the latest data
-            new_data = tvl.get_hist(symbol, exchange, interval=interval, n_bars=240, 
-                                  fut_contract=None, extended_session=False, timeout=-1)
-            if new_data is None:
-                logging.error("Failed to fetch real-time data")
-                raise Exception("Data fetch error")
-            
-            new_data.reset_index(inplace=True)
-            new_data.rename(columns={'datetime': 'date'}, inplace=True)
-            new_data['date'] = new_data['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-            new_data = new_data[['date', 'open', 'high', 'low', 'close', 'volume']]
-            new_data['interval'] = current_interval  # Add interval information
-
-            # Calculate indicators using the strategy class
-            new_data = strategy.calculate_indicators(new_data)
-
-            # Update the OHLCV file
-            try:
-                if os.path.exists(ohlcv_file):
-                    existing_data = pd.read_csv(ohlcv_file)
-                    # Only concatenate if intervals match
-                    if existing_data['interval'].iloc[0] == current_interval:
-                        updated_data = pd.concat([existing_data, new_data]).drop_duplicates(subset='date', keep='last')
-                    else:
-                        updated_data = new_data
-                else:
-                    updated_data = new_data
-
-                updated_data = updated_data.reset_index(drop=True)
-                updated_data.fillna(0, inplace=True)
-                updated_data.to_csv(ohlcv_file, index=False)
-                logging.info(f"Data updated successfully for {current_interval} interval")
-
-            except Exception as e:
-                logging.error(f"Error updating OHLCV file: {e}")
-                updated_data = new_data
-                updated_data.to_csv(ohlcv_file, index=False)
-
-            # Generate signals directly using the strategy class
-            last_processed_index = strategy.generate_signals(updated_data, chart, signal_system_file, ohlcv_file, last_processed_index)
+            for change in changes:
+                config = change.new
+                current_interval = config.get('interval', '1m')
+                if apply_config_change(strategy, bar_store, change, ohlcv_file):
+                    last_processed_index = None
+                sleep_time, n_bars, seed_bars = get_interval_settings(config, strategy)
+            changes = []
+
+            # Warm-up older than one 1m request reaches is seeded at the native interval
+            seed = None
+            if strategy.indicator_engine is None and seed_bars:
+                with metrics.timer(label, 'fetch'):
+                    seed = fetch_seed_bars(symbol, exchange, current_interval, seed_bars)
+
+            # Cold indicators are rebuilt from the stored 1m bars before touching the network
+            if strategy.indicator_engine is None and len(resampler.base_store):
+                last_processed_index = process_base_bars(strategy, bar_store, resampler, None, markers, ohlcv_file,
+                                                         signal_system_file, current_interval, last_processed_index,
+                                                         seed)
+
+            # Fetch only the 1m bars missing since the last stored one (plus a small overlap)
+            last_time = resampler.base_store.last_time()
+            fetch_n_bars = planner.plan(last_time, 60, n_bars, warm=len(resampler.base_store) >= n_bars)
+            with metrics.timer(label, 'tick'):
+                with metrics.timer(label, 'fetch'):
+                    new_data = tvl.get_hist(symbol, exchange, interval=get_feed_interval(), n_bars=fetch_n_bars,
+                                          fut_contract=None, extended_session=False, timeout=-1)
+                if new_data is None:
+                    logging.error("Failed to fetch real-time data")
+                    raise Exception("Data fetch error")
+
+                new_data = prepare_bars(new_data)
+                planner.report(symbol, new_data, last_time, len(resampler.base_store))
+                last_processed_index = process_base_bars(strategy, bar_store, resampler, new_data, markers, ohlcv_file,
+                                                         signal_system_file, current_interval, last_processed_index,
+                                                         seed)
 
         except Exception as e:
             logging.error(f"Error in fetch_and_update_data: {e}")
-            tvl = TvDatafeedLive(username, password)
+            metrics.count(label, 'tick_errors')
 
-        time.sleep(sleep_time)
+        # Sleep until the next bar, waking early if the config changes
+        changes = wait_for_changes(config_updates, sleep_time)
 
 # Function to start the data fetching in a separate thread
 def start_data_fetching(chart, ohlcv_file, signal_system_file, symbol, exchange, strategy_config_file="strategy_config.json"):
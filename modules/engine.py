@@ -0,0 +1,170 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.logging_utils import logging
+from utils.trading_strategy import TradingStrategy
+from utils.file_utils import data_dir
+from modules.bar_store import open_bar_store, open_base_store
+from modules.resampler import Resampler, BASE_INTERVAL
+from modules.event_bus import event_bus, markers_topic, MarkerPublisher
+from modules.fetch_planner import FetchPlanner
+from modules.config_service import get_config_service, wait_for_changes
+from modules import data_fetcher
+from utils.metrics import metrics, metrics_label
+
+
+class SymbolRunner:
+    """Per-symbol state (strategy, bar store, processed index) driven by the engine's event loop."""
+
+    def __init__(self, target, strategy_config_file):
+        self.symbol = target['Symbol']
+        self.exchange = target['Exchange']
+        self.title = target['Title']
+        self.ohlcv_file = os.path.join(data_dir, f"{target['Filename']}_Real_Time_OHLCV.csv")
+        self.signal_system_file = os.path.join(data_dir, f"{target['Filename']}_Signal_system.csv")
+        self.strategy_config_file = strategy_config_file
+        self.bar_store = open_bar_store(self.ohlcv_file)
+        self.resampler = Resampler(open_base_store(self.ohlcv_file))
+        self.markers = MarkerPublisher(event_bus, markers_topic(self.ohlcv_file))
+        self.last_processed_index = None
+        self.planner = FetchPlanner()
+        self.label = metrics_label(self.ohlcv_file)
+        self.last_time = None
+        config_service = get_config_service(strategy_config_file)
+        self.config_updates = config_service.subscribe()
+        self.config = config_service.config
+        self.current_interval = self.config.get('interval', '1m')
+        self.strategy = TradingStrategy(config_file=strategy_config_file)
+        if len(self.bar_store):
+            self.strategy.load_indicator_state(data_fetcher.get_indicator_state_file(self.ohlcv_file))
+
+    def apply_config_changes(self):
+        """Apply the config changes published since the last tick, keeping open trades."""
+        for change in wait_for_changes(self.config_updates):
+            if data_fetcher.apply_config_change(self.strategy, self.bar_store, change, self.ohlcv_file):
+                self.last_processed_index = None
+            self.config = change.new
+            self.current_interval = change.new.get('interval', '1m')
+
+    @property
+    def needs_rebuild(self):
+        """True when the indicators are cold but the interval can be rebuilt from stored 1m bars."""
+        return self.strategy.indicator_engine is None and len(self.resampler.base_store) > 0
+
+    def plan_fetch(self, max_bars):
+        base_store = self.resampler.base_store
+        self.last_time = base_store.last_time()
+        return self.planner.plan(self.last_time, 60, max_bars, warm=len(base_store) >= max_bars)
+
+    def process(self, new_data=None, seed=None):
+        """
+        Resampling, indicator math, store upsert and signal generation for fetched 1m bars
+        (or a rebuild from the stored ones if new_data is None, with optional native-interval
+        seed bars); runs on the engine's worker pool.
+        """
+        if new_data is not None:
+            new_data = data_fetcher.prepare_bars(new_data)
+            self.planner.report(self.symbol, new_data, self.last_time, len(self.resampler.base_store))
+        self.last_processed_index = data_fetcher.process_base_bars(
+            self.strategy, self.bar_store, self.resampler, new_data, self.markers, self.ohlcv_file,
+            self.signal_system_file, self.current_interval, self.last_processed_index, seed)
+
+
+class TradingEngine:
+    """
+    Runs every target inside one process on a single asyncio loop.
+
+    All symbols share the feed client; at most `max_symbols` symbols fetch or
+    process at the same time, and the indicator/signal work runs on a bounded
+    worker pool so the loop itself never blocks.
+    """
+
+    def __init__(self, targets, strategy_config_file, max_symbols=4, workers=2):
+        self.targets = targets
+        self.strategy_config_file = strategy_config_file
+        self.max_symbols = max_symbols
+        self.workers = workers
+        self.loop = None
+        self.main_task = None
+        self.thread = None
+
+    async def _fetch(self, runner, n_bars, interval=BASE_INTERVAL):
+        loop = asyncio.get_event_loop()
+
+        def fetch():
+            with metrics.timer(runner.label, 'fetch'):
+                return data_fetcher.tvl.get_hist(runner.symbol, runner.exchange,
+                                                 interval=data_fetcher.get_feed_interval(interval),
+                                                 n_bars=n_bars, fut_contract=None, extended_session=False, timeout=-1)
+
+        return await loop.run_in_executor(self.feed_pool, fetch)
+
+    async def _run_symbol(self, runner):
+        loop = asyncio.get_event_loop()
+        sleep_time = data_fetcher.POLL_SECONDS[BASE_INTERVAL]  # Retry pace if the first tick fails before reading the config
+        while True:
+            try:
+                async with self.limit:
+                    # 'tick' includes time queued for the feed and worker pools
+                    with metrics.timer(runner.label, 'tick'):
+                        runner.apply_config_changes()
+                        sleep_time, n_bars, seed_bars = data_fetcher.get_interval_settings(runner.config, runner.strategy)
+                        # Warm-up older than one 1m request reaches is seeded at the native interval
+                        seed = None
+                        if runner.strategy.indicator_engine is None and seed_bars:
+                            seed = await self._fetch(runner, seed_bars, runner.current_interval)
+                            if seed is None:
+                                raise Exception("Seed fetch error")
+                            seed = data_fetcher.prepare_bars(seed)
+                        if runner.needs_rebuild:
+                            await loop.run_in_executor(self.worker_pool, runner.process, None, seed)
+                        new_data = await self._fetch(runner, runner.plan_fetch(n_bars))
+                        if new_data is None:
+                            raise Exception("Data fetch error")
+                        await loop.run_in_executor(self.worker_pool, runner.process, new_data, seed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error in engine tick for {runner.symbol}: {e}")
+                metrics.count(runner.label, 'tick_errors')
+            await asyncio.sleep(sleep_time)
+
+    async def run(self):
+        self.limit = asyncio.Semaphore(self.max_symbols)
+        self.feed_pool = ThreadPoolExecutor(max_workers=self.max_symbols, thread_name_prefix='feed')
+        self.worker_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='indicators')
+        runners = [SymbolRunner(target, self.strategy_config_file) for target in self.targets]
+        logging.info(f"Engine running {len(runners)} symbols (max {self.max_symbols} concurrent, {self.workers} workers)")
+        try:
+            await asyncio.gather(*(self._run_symbol(runner) for runner in runners))
+        except asyncio.CancelledError:
+            logging.info("Engine stopped")
+        finally:
+            self.feed_pool.shutdown(wait=True)
+            self.worker_pool.shutdown(wait=True)
+
+    def _thread_main(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.main_task)
+        except asyncio.CancelledError:
+            pass  # Stopped before run() got to start
+        finally:
+            self.loop.close()
+
+    def start(self):
+        """Start the engine loop in a background thread (the Tk UI keeps the main thread)."""
+        # Created here rather than in the thread, so a stop() right after start() still has a task to cancel
+        self.loop = asyncio.new_event_loop()
+        self.main_task = self.loop.create_task(self.run())
+        self.thread = threading.Thread(target=self._thread_main, name='trading-engine', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        """Cancel every symbol task and wait for in-flight work to finish."""
+        if self.main_task is not None and not self.main_task.done():
+            self.loop.call_soon_threadsafe(self.main_task.cancel)
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.thread = None
@@ -0,0 +1,71 @@
+import queue
+import threading
+from collections import defaultdict
+from utils.logging_utils import logging
+
+
+def bars_topic(ohlcv_file):
+    """Topic carrying bar/indicator deltas for one symbol."""
+    return f"{ohlcv_file}:bars"
+
+
+def markers_topic(ohlcv_file):
+    """Topic carrying chart markers for signal events of one symbol."""
+    return f"{ohlcv_file}:markers"
+
+
+class EventBus:
+    """
+    Minimal in-process publish/subscribe bus.
+
+    Every subscriber gets its own bounded queue of (topic, event) tuples, so a slow
+    consumer never blocks the publisher; when a queue is full its oldest event is dropped.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, *topics):
+        subscription = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            for topic in topics:
+                self._subscribers[topic].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                if subscription in subscribers:
+                    subscribers.remove(subscription)
+
+    def publish(self, topic, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            while True:
+                try:
+                    subscription.put_nowait((topic, event))
+                    break
+                except queue.Full:
+                    try:
+                        subscription.get_nowait()
+                        logging.warning(f"Subscriber queue full on {topic}, dropped the oldest event")
+                    except queue.Empty:
+                        pass
+
+
+class MarkerPublisher:
+    """Stands in for the chart in the fetcher thread and forwards marker() calls over the bus."""
+
+    def __init__(self, bus, topic):
+        self.bus = bus
+        self.topic = topic
+
+    def marker(self, **kwargs):
+        self.bus.publish(self.topic, kwargs)
+
+
+# Process-wide bus shared by the fetcher and chart threads
+event_bus = EventBus()
@@ -0,0 +1,49 @@
+import math
+import pandas as pd
+from utils.logging_utils import logging
+
+
+def now_epoch():
+    """Current wall-clock time in the naive-local epoch seconds the bar store uses."""
+    return pd.Timestamp.now().value // 10**9
+
+
+class FetchPlanner:
+    """
+    Decides how many bars to request each cycle.
+
+    Only the bars since the last stored one are requested, plus `overlap` bars so
+    revisions of the still-forming candle are picked up. A cold start, a missing
+    indicator state or an outage longer than `max_bars` falls back to a full backfill.
+    """
+
+    def __init__(self, overlap=2):
+        self.overlap = overlap
+        self.total_fetched = 0
+        self.total_reused = 0
+
+    def plan(self, last_time, bar_seconds, max_bars, warm=True, now=None):
+        """Return the n_bars to request from the feed."""
+        if last_time is None or not warm:
+            return max_bars
+        now = now_epoch() if now is None else now
+        missing = max(math.ceil((now - last_time) / bar_seconds), 0)
+        n_bars = missing + self.overlap
+        if n_bars > max_bars:
+            logging.info(f"Gap of {missing} bars exceeds {max_bars}, doing a full backfill")
+            return max_bars
+        return n_bars
+
+    def report(self, symbol, data, last_time, stored):
+        """Log and return how many bars this cycle fetched versus reused from the store."""
+        fetched = len(data)
+        if last_time is None:
+            new = fetched
+        else:
+            new = int((data['time'].to_numpy() > last_time).sum())
+        revised = fetched - new
+        reused = max(stored - revised, 0)
+        self.total_fetched += fetched
+        self.total_reused += reused
+        logging.info(f"{symbol}: fetched {fetched} bars ({new} new, {revised} revised), reused {reused} stored bars")
+        return {'fetched': fetched, 'new': new, 'revised': revised, 'reused': reused}
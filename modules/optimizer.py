@@ -0,0 +1,276 @@
+import argparse
+import functools
+import math
+import operator
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from indicators.batch import IndicatorPanel
+from indicators.cache import indicator_cache
+from utils.trading_strategy import compute_signal_conditions
+from modules.backtester import (SIGNAL_PARAMS, expand_grid, group_indicator_arrays, load_bars, load_config,
+                                simulate_trades, summarize)
+from modules.config_service import INDICATOR_PARAMS, save_config
+from utils.logging_utils import logging
+
+# Values the search may pick for each strategy parameter
+SEARCH_SPACE = {
+    'rsi_period': [7, 9, 14, 21],
+    'stochrsi_period': [9, 14, 21],
+    'macd_fast_period': [8, 12, 16],
+    'macd_slow_period': [21, 26, 34],
+    'macd_signal_period': [7, 9, 12],
+    'rsi_overbought': [65, 70, 75, 80],
+    'rsi_oversold': [20, 25, 30, 35],
+    'stochrsi_overbought': [70, 80, 90],
+    'stochrsi_oversold': [10, 20, 30],
+    'take_profit': [0.5, 1.0, 1.5, 2.0, 3.0],
+    'stop_loss': [0.5, 1.0, 1.5, 2.0],
+}
+
+SEARCH_METHODS = ['grid', 'random', 'halving']
+
+# Largest grid search optimize() accepts; SEARCH_SPACE expands to about a million configs
+MAX_GRID_CONFIGS = 20000
+
+# Successive halving keeps 1/HALVING_RATE of the candidates per round and gives them HALVING_RATE times the folds
+HALVING_RATE = 3
+
+
+def walk_forward_splits(length, folds, train_fraction=0.5):
+    """
+    Anchored walk-forward splits of `length` bars: the first train_fraction is the first
+    training window and the rest is cut into `folds` consecutive test windows, each trained
+    on everything before it. Returns ((train_start, train_stop), (test_start, test_stop)) pairs.
+    """
+    bounds = np.linspace(int(length * train_fraction), length, folds + 1).astype(int)
+    return [((0, int(start)), (int(start), int(stop))) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def space_size(space):
+    """Number of combinations in a search space, before invalid MACD period pairs are dropped."""
+    return functools.reduce(operator.mul, (len(values) for values in space.values()), 1)
+
+
+def sample_configs(space, n, base_config, seed=0):
+    """Draw n distinct random configs from the search space (fewer if the space is smaller)."""
+    rng = random.Random(seed)
+    configs, seen = [], set()
+    size = space_size(space)
+    for _ in range(min(n, size) * 20):
+        if len(configs) >= n:
+            break
+        values = {key: rng.choice(choices) for key, choices in space.items()}
+        key = tuple(values.values())
+        config = dict(base_config, **values)
+        if key in seen or config['macd_fast_period'] >= config['macd_slow_period']:
+            continue
+        seen.add(key)
+        configs.append(config)
+    return configs
+
+
+class SharedBars:
+    """
+    OHLC arrays of several symbols packed into one .npy file that worker processes
+    memory-map read-only, so a task pickles only its configs and never the bars.
+    """
+
+    COLUMNS = ('close', 'high', 'low', 'open')
+
+    def __init__(self, frames, directory):
+        self.symbols = list(frames)
+        self.lengths = [len(df) for df in frames.values()]
+        self.path = os.path.join(directory, 'bars.npy')
+        packed = np.lib.format.open_memmap(self.path, mode='w+', dtype=np.float64,
+                                           shape=(len(self.symbols), len(self.COLUMNS), max(self.lengths, default=0)))
+        for row, df in enumerate(frames.values()):
+            for index, column in enumerate(self.COLUMNS):
+                packed[row, index, :len(df)] = df[column].to_numpy(dtype=np.float64)
+        packed.flush()
+        del packed
+
+    @property
+    def handle(self):
+        """What a worker needs to open the bars: (path, symbols, lengths)."""
+        return self.path, self.symbols, self.lengths
+
+
+_worker_bars = None
+
+
+def open_shared_bars(path, symbols, lengths):
+    """Worker initializer: map the packed bars once per process as {symbol: (close, high, low, open)} views."""
+    global _worker_bars
+    packed = np.load(path, mmap_mode='r')
+    _worker_bars = {symbol: tuple(packed[row, index, :length] for index in range(len(SharedBars.COLUMNS)))
+                    for row, (symbol, length) in enumerate(zip(symbols, lengths))}
+
+
+def _segment_returns(arrays, conditions, config, start, stop):
+    close, high, low, open_ = (values[start:stop] for values in arrays)
+    open_condition, close_condition = (values[start:stop] for values in conditions)
+    return simulate_trades(close, high, low, open_condition, close_condition,
+                           config['take_profit'], config['stop_loss'], open_)
+
+
+def evaluate_walk_forward(configs, folds, used_folds, train_fraction):
+    """
+    Score configs that share the same indicator periods on the last `used_folds` of the
+    `folds` walk-forward splits of every symbol; runs inside a worker process against the shared bars.
+    Indicators are computed once over the full history (they are causal, and do not depend on
+    the folds, so later rounds reuse them from the worker's indicator cache), and trades are
+    simulated separately inside each train and test window. holdout_pnl is the P&L of the
+    final test window, which no training window contains.
+    """
+    bars = _worker_bars
+    panel = IndicatorPanel(bars.keys(), [arrays[0] for arrays in bars.values()])
+    indicators = group_indicator_arrays(panel, {key: configs[0][key] for key in INDICATOR_PARAMS}, indicator_cache)
+    results = []
+    for config in configs:
+        train, test, holdout = [], [], []
+        for symbol, arrays in bars.items():
+            stochrsi_k, rsi, macd, macd_signal = indicators[symbol]
+            conditions = compute_signal_conditions(
+                stochrsi_k, rsi, macd, macd_signal, config['rsi_overbought'], config['rsi_oversold'],
+                config['stochrsi_overbought'], config['stochrsi_oversold'])
+            splits = walk_forward_splits(len(arrays[0]), folds, train_fraction)
+            for train_window, test_window in splits[-used_folds:]:
+                train.append(summarize(_segment_returns(arrays, conditions, config, *train_window)))
+                test.append(summarize(_segment_returns(arrays, conditions, config, *test_window)))
+            holdout.append(test[-1])
+        result = {key: config[key] for key in INDICATOR_PARAMS + SIGNAL_PARAMS}
+        result.update({
+            'train_pnl': float(np.mean([r['pnl'] for r in train])),
+            'train_trades': int(sum(r['trades'] for r in train)),
+            'train_positive_folds': float(np.mean([r['pnl'] > 0 for r in train])),
+            'test_pnl': float(np.mean([r['pnl'] for r in test])),
+            'test_win_rate': float(np.mean([r['win_rate'] for r in test])),
+            'test_max_drawdown': float(max(r['max_drawdown'] for r in test)),
+            'test_trades': int(sum(r['trades'] for r in test)),
+            'positive_folds': float(np.mean([r['pnl'] > 0 for r in test])),
+            'holdout_pnl': float(np.mean([r['pnl'] for r in holdout])),
+        })
+        results.append(result)
+    return results
+
+
+def _evaluate(executor, configs, folds, used_folds, train_fraction):
+    """Evaluate configs grouped by indicator periods, one task per group, and return their results."""
+    groups = {}
+    for config in configs:
+        groups.setdefault(tuple(config[key] for key in INDICATOR_PARAMS), []).append(config)
+    results = []
+    tasks = [executor.submit(evaluate_walk_forward, group, folds, used_folds, train_fraction)
+             for group in groups.values()]
+    for task in tasks:
+        results.extend(task.result())
+    return results
+
+
+def _rank(results):
+    """
+    Order by P&L on the training windows, breaking ties by the share of profitable ones.
+    Test results never take part, so they stay an out-of-sample estimate for the chosen configs.
+    """
+    return sorted(results, key=lambda r: (r['train_trades'] > 0, r['train_pnl'], r['train_positive_folds']),
+                  reverse=True)
+
+
+def optimize(frames, search='halving', n_candidates=200, folds=4, train_fraction=0.5, space=None,
+             base_config=None, max_workers=None, seed=0):
+    """
+    Search strategy parameters over the bars in {symbol: DataFrame} and validate every
+    candidate with walk-forward splits. 'grid' tries every combination of the space (at most
+    MAX_GRID_CONFIGS, so it needs a reduced space),
+    'random' n_candidates samples of it, and 'halving' starts from n_candidates samples
+    scored on the most recent fold and keeps the best 1/HALVING_RATE on HALVING_RATE times
+    as many folds until all folds are used. Candidates are selected and pruned on their
+    training windows only. Returns a DataFrame of results in that order, with the test
+    and holdout columns as out-of-sample scores.
+    """
+    base_config = load_config(os.path.join('config', 'strategy_config.json')) if base_config is None else base_config
+    space = SEARCH_SPACE if space is None else space
+    if search == 'grid':
+        if space_size(space) > MAX_GRID_CONFIGS:
+            raise ValueError(f"Grid search over {space_size(space)} configs exceeds MAX_GRID_CONFIGS "
+                             f"({MAX_GRID_CONFIGS}); pass a smaller space or use random/halving search")
+        candidates = expand_grid(space, base_config)
+    elif search in ('random', 'halving'):
+        candidates = sample_configs(space, n_candidates, base_config, seed)
+    else:
+        raise ValueError(f"Unknown search method: {search!r}")
+
+    started = time.time()
+    evaluated = 0
+    workdir = tempfile.mkdtemp(prefix='stock_ai_optimizer_')
+    try:
+        shared = SharedBars(frames, workdir)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=open_shared_bars,
+                                 initargs=shared.handle) as executor:
+            round_folds = 1 if search == 'halving' else folds
+            while True:
+                results = _rank(_evaluate(executor, candidates, folds, round_folds, train_fraction))
+                evaluated += len(candidates)
+                if round_folds >= folds:
+                    break
+                logging.info(f"Successive halving: {len(candidates)} candidates on {round_folds} folds, "
+                             f"best train P&L {results[0]['train_pnl']:.2f}%")
+                keep = {tuple(r[key] for key in INDICATOR_PARAMS + SIGNAL_PARAMS)
+                        for r in results[:max(1, math.ceil(len(results) / HALVING_RATE))]}
+                candidates = [config for config in candidates
+                              if tuple(config[key] for key in INDICATOR_PARAMS + SIGNAL_PARAMS) in keep]
+                round_folds = min(folds, round_folds * HALVING_RATE)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = time.time() - started
+    logging.info(f"Optimized {evaluated} evaluations ({search}) over {len(frames)} symbols in {elapsed:.2f}s "
+                 f"({evaluated / elapsed if elapsed else 0:.1f}/s)")
+    return pd.DataFrame(results)
+
+
+def write_candidate_config(results, base_config, candidate_file):
+    """Write the best configuration on top of base_config (keeping its interval) as a candidate config file."""
+    best = {column: values.iloc[0] for column, values in results.items()}  # Per column, so ints stay ints
+    config = dict(base_config)
+    for key in INDICATOR_PARAMS + SIGNAL_PARAMS:
+        config[key] = best[key].item() if hasattr(best[key], 'item') else best[key]
+    save_config(candidate_file, config)
+    logging.info(f"Wrote candidate config to {candidate_file} (train P&L {best['train_pnl']:.2f}%, "
+                 f"out-of-sample test P&L {best['test_pnl']:.2f}%, holdout P&L {best['holdout_pnl']:.2f}%, "
+                 f"{best['positive_folds'] * 100:.0f}% profitable test folds)")
+    return config
+
+
+if __name__ == '__main__':
+    # Usage: python -m modules.optimizer data/BTC_USD_Real_Time_OHLCV.csv [...] [--search halving] [--candidates 200]
+    parser = argparse.ArgumentParser(description="Walk-forward parameter search over stored bars")
+    parser.add_argument('ohlcv_files', nargs='+')
+    parser.add_argument('--search', choices=SEARCH_METHODS, default='halving')
+    parser.add_argument('--space', default=None, help="JSON file of {parameter: [values]} to search instead of SEARCH_SPACE")
+    parser.add_argument('--candidates', type=int, default=200, help="configs sampled by random/halving search")
+    parser.add_argument('--folds', type=int, default=4, help="walk-forward test windows")
+    parser.add_argument('--train-fraction', type=float, default=0.5, help="share of the bars before the first test window")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config', default=os.path.join('config', 'strategy_config.json'))
+    parser.add_argument('--output', default=os.path.join('config', 'strategy_config.candidate.json'))
+    args = parser.parse_args()
+
+    base_config = load_config(args.config)
+    frames = {os.path.basename(ohlcv_file).replace('_Real_Time_OHLCV.csv', ''): load_bars(ohlcv_file)
+              for ohlcv_file in args.ohlcv_files}
+    space = load_config(args.space) if args.space else None
+    try:
+        results = optimize(frames, args.search, args.candidates, args.folds, args.train_fraction, space=space,
+                           base_config=base_config, max_workers=args.workers, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(results.head(10).to_string(index=False))
+    write_candidate_config(results, base_config, args.output)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Interval of the bars that are fetched and stored; every other interval is derived from it
+BASE_INTERVAL = '1m'
+
+INTERVAL_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+OHLCV_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+
+def interval_seconds(interval):
+    """Length of an interval such as '1m', '5m', '1h' or '1d' in seconds."""
+    try:
+        seconds = int(interval[:-1]) * INTERVAL_UNITS[interval[-1]]
+    except (KeyError, ValueError, IndexError, TypeError):
+        raise ValueError(f"Unsupported interval: {interval!r}")
+    if seconds <= 0 or seconds % 60:
+        raise ValueError(f"Unsupported interval: {interval!r}")
+    return seconds
+
+
+def resample_bars(df, interval):
+    """
+    Aggregate sorted 1-minute bars into `interval` bars: first open, highest high, lowest low,
+    last close and summed volume. Buckets start at whole multiples of the interval, so the
+    newest bar is the still-forming one and is revised as more 1-minute bars arrive.
+    """
+    step = interval_seconds(interval)
+    if df.empty:
+        return pd.DataFrame({column: np.empty(0, dtype=np.int64 if column == 'time' else np.float64)
+                             for column in OHLCV_COLUMNS})
+    buckets = df['time'].to_numpy(dtype=np.int64) // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        'time': buckets[starts],
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(high, starts),
+        'low': np.minimum.reduceat(low, starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(volume, starts),
+    })
+
+
+class Resampler:
+    """
+    Derives any interval from the 1-minute base store of a symbol.
+
+    update() stores freshly fetched 1-minute bars and returns the time of the oldest one;
+    resample(interval, since) then re-aggregates only the buckets from that time onward.
+    Several intervals can be resampled from one update, so one fetch serves every timeframe.
+    """
+
+    def __init__(self, base_store):
+        self.base_store = base_store
+
+    def update(self, bars):
+        """Upsert 1-minute bars into the base store; returns the epoch time of the first one, or None."""
+        if bars is None or bars.empty:
+            return None
+        start = self.base_store.upsert(bars[OHLCV_COLUMNS], interval=BASE_INTERVAL)
+        return int(self.base_store.times(start, start + 1)[0])
+
+    def resample(self, interval, since=None):
+        """
+        Return the `interval` bars covering base bars at or after epoch `since`
+        (from the start of its bucket), or the whole stored history if since is None.
+        """
+        start = 0
+        if since is not None:
+            step = interval_seconds(interval)
+            start = self.base_store.position(since // step * step)
+        return resample_bars(self.base_store.read(start=start)[OHLCV_COLUMNS], interval)
+
+    def rebuild(self, interval, n_bars, seed=None):
+        """
+        Return the last n_bars `interval` bars resampled from the base store (hot rows and
+        archive), for cold indicators.
+        `seed` bars fetched at the native interval fill the span before the first bucket the
+        1m bars cover in full, so the warm-up does not depend on how far back 1m bars reach.
+        """
+        step = interval_seconds(interval)
+        last_time = self.base_store.last_time()
+        if last_time is None:
+            base = resample_bars(pd.DataFrame(columns=OHLCV_COLUMNS), interval)
+        else:
+            # Archived 1m days count too, so a coarser interval than the one trimming the base store still warms up
+            base = self.base_store.read_history((last_time // step - n_bars + 1) * step)[OHLCV_COLUMNS]
+        bars = resample_bars(base, interval)
+        if seed is None or seed.empty:
+            return bars
+        first_full = -(-int(base['time'].iloc[0]) // step) * step if len(base) else np.iinfo(np.int64).max
+        bars = pd.concat([seed.loc[seed['time'] < first_full, OHLCV_COLUMNS], bars[bars['time'] >= first_full]],
+                         ignore_index=True)
+        return bars.iloc[-n_bars:].reset_index(drop=True)
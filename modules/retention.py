@@ -0,0 +1,60 @@
+from modules.archive import day_start
+from modules.bar_store import from_epoch
+from modules.resampler import interval_seconds, BASE_INTERVAL
+from modules.trade_ledger import open_trade_ledger
+from utils.logging_utils import logging
+
+# Bars the chart shows on top of the indicator warm-up
+CHART_VIEWPORT_BARS = 1000
+
+# EWM-based indicators (RSI, MACD) need several lookbacks before dropped bars stop mattering
+WARMUP_LOOKBACKS = 10
+
+
+def warmup_bars(strategy):
+    """Bars of the trading interval the indicators need before their values settle: the longest lookback, warmed up."""
+    lookback = max(strategy.rsi_period + strategy.stochrsi_period,
+                   strategy.macd_slow_period + strategy.macd_signal_period)
+    return lookback * WARMUP_LOOKBACKS
+
+
+def hot_bars(strategy, viewport=CHART_VIEWPORT_BARS):
+    """Bars of the trading interval kept in the store: the indicator warm-up plus the viewport."""
+    return warmup_bars(strategy) + viewport
+
+
+def retention_cutoff(store, keep):
+    """
+    Epoch time before which bars of `store` can be archived while keeping the newest `keep`,
+    or None if nothing can go yet. Only whole days are archived, so the cutoff is a day start.
+    """
+    length = len(store)
+    if length <= keep:
+        return None
+    cutoff = int(day_start(store.times(length - keep, length - keep + 1)[0]))
+    return cutoff if store.position(cutoff) > 0 else None
+
+
+def apply_retention(strategy, bar_store, base_store, signal_system_file, interval, last_processed_index):
+    """
+    Roll whole days that left the hot window into the archives: the interval bars, the 1m bars
+    behind them and the closed trades bought before them. Memory and store sizes then stay flat
+    however long the symbol runs. Returns last_processed_index shifted to the compacted store.
+    """
+    keep = hot_bars(strategy)
+    cutoff = retention_cutoff(bar_store, keep)
+    if cutoff is not None:
+        removed = bar_store.archive_before(cutoff)
+        archived = open_trade_ledger(signal_system_file).archive_before(from_epoch([cutoff])[0])
+        logging.info(f"Archived {removed} {interval} bars and {archived} closed trades before {from_epoch([cutoff])[0]}")
+        if last_processed_index is not None:
+            last_processed_index -= removed
+
+    # The base store keeps the same span of time hot; a cold rebuild at a coarser interval
+    # reads the archived 1m days as well (Resampler.rebuild), so it still covers its hot window
+    base_keep = keep * interval_seconds(interval) // interval_seconds(BASE_INTERVAL)
+    base_cutoff = retention_cutoff(base_store, base_keep)
+    if base_cutoff is not None:
+        removed = base_store.archive_before(base_cutoff)
+        logging.info(f"Archived {removed} {BASE_INTERVAL} bars before {from_epoch([base_cutoff])[0]}")
+    return last_processed_index
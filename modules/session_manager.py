@@ -0,0 +1,220 @@
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils.logging_utils import logging
+
+username = 'jazibmemon12'
+password = 'jazib@123456789000'
+
+# Seconds per bar for the tvDatafeed Interval values the app uses, and for the plain interval strings
+INTERVAL_SECONDS = {'1': 60, '5': 300, '1H': 3600, '1m': 60, '5m': 300, '1h': 3600}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the feed while the circuit breaker is open."""
+
+
+class FakeFeed:
+    """
+    Offline stand-in for TvDatafeedLive. get_hist returns a deterministic synthetic series
+    per symbol whose last bar is the current (still forming) bar of the interval.
+    Set failure_rate to inject errors and exercise the retry/breaker logic.
+    """
+
+    def __init__(self, failure_rate=0.0, seed=0):
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def get_hist(self, symbol, exchange, interval=None, n_bars=10, fut_contract=None, extended_session=False, timeout=-1):
+        if self.random.random() < self.failure_rate:
+            raise ConnectionError("FakeFeed: injected failure")
+
+        step = INTERVAL_SECONDS.get(getattr(interval, 'value', interval), 60)
+        last = (pd.Timestamp.now().value // 10**9) // step  # naive local time, like tvDatafeed
+        bar_numbers = np.arange(last - n_bars + 1, last + 1)
+
+        # Derive each bar from its own number so overlapping requests agree on shared bars
+        base = sum(map(ord, f"{symbol}:{exchange}")) + self.seed
+        noise = np.sin(bar_numbers * 12.9898 + base) * 43758.5453
+        moves = (noise - np.floor(noise)) - 0.5
+        close = 100 + base % 50 + 2 * np.sin(bar_numbers / 50.0) + 0.5 * np.sin(bar_numbers / 7.3 + base) + 0.2 * moves
+        open_ = close - 0.1 * moves
+        spread = np.abs(moves) * 0.05
+
+        index = pd.DatetimeIndex(pd.to_datetime(bar_numbers * step, unit='s'), name='datetime')
+        return pd.DataFrame({
+            'symbol': f"{exchange}:{symbol}",
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': np.abs(moves) * 1000,
+        }, index=index)
+
+
+class Session:
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.time()
+        self.failures = 0  # Consecutive; reset by a successful call
+        self.calls = 0
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class SessionManager:
+    """
+    Owns the authenticated feed clients of the process.
+
+    Clients are created lazily and handed out from a small pool. A pooled client is
+    logged in again once it is older than `max_session_age` or after `session_failures`
+    consecutive failed calls (including calls that return no data); retries are spaced
+    out with jittered exponential backoff, and after `failure_threshold` consecutive
+    failures the circuit opens and calls fail fast until `reset_timeout` has passed.
+    """
+
+    def __init__(self, factory, pool_size=1, max_retries=3, base_delay=1.0, max_delay=60.0,
+                 failure_threshold=5, reset_timeout=60.0, session_failures=3, max_session_age=6 * 3600):
+        self.factory = factory
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session_failures = session_failures
+        self.max_session_age = max_session_age
+
+        self.pool = queue.Queue()
+        for _ in range(pool_size):
+            self.pool.put(None)  # Empty slot, logged in on first use
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.logins = 0
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.time() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def _before_call(self):
+        if self.state == 'open':
+            raise CircuitOpenError(f"Feed circuit open after {self.consecutive_failures} consecutive failures")
+
+    def _record_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+
+    def _record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+                # Trip (or re-trip after a failed half-open trial)
+                self.opened_at = time.time()
+                logging.error(f"Feed circuit opened after {self.consecutive_failures} consecutive failures")
+
+    def _expired(self, session):
+        """Why a pooled session must not be reused, or None if it is still good."""
+        if session.failures >= self.session_failures:
+            return f"{session.failures} consecutive failures"
+        if session.age >= self.max_session_age:
+            return f"age {session.age:.0f}s"
+        return None
+
+    def _acquire(self):
+        session = self.pool.get()
+        reason = 'first use' if session is None else self._expired(session)
+        if reason is not None:
+            try:
+                with self.lock:
+                    self.logins += 1
+                logging.info(f"Creating a new feed session ({reason})")
+                session = Session(self.factory())
+            except Exception:
+                self.pool.put(None)
+                raise
+        return session
+
+    def call(self, method, *args, **kwargs):
+        """Call a method of a pooled client with retries, backoff and the circuit breaker."""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self._before_call()
+            try:
+                session = self._acquire()
+            except Exception as e:
+                last_error = e
+                self._record_failure()
+            else:
+                try:
+                    result = getattr(session.client, method)(*args, **kwargs)
+                    if result is None:
+                        raise ValueError(f"{method} returned no data")
+                    session.calls += 1
+                    session.failures = 0
+                    self._record_success()
+                    return result
+                except Exception as e:
+                    last_error = e
+                    session.failures += 1
+                    self._record_failure()
+                finally:
+                    # Failing sessions go back too; _acquire logs in again once they are past session_failures
+                    self.pool.put(session)
+
+            if attempt < self.max_retries:
+                delay = self.backoff_delay(attempt)
+                logging.warning(f"Feed call failed ({last_error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        raise last_error
+
+    def get_hist(self, *args, **kwargs):
+        return self.call('get_hist', *args, **kwargs)
+
+    def health_check(self):
+        """Return a snapshot of the breaker state and pool for logging or monitoring."""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'logins': self.logins,
+            'pool_size': self.pool_size,
+            'idle_sessions': self.pool.qsize(),
+        }
+
+
+def default_factory():
+    """Build a feed client; STOCK_AI_FEED=fake selects the offline FakeFeed."""
+    if os.environ.get('STOCK_AI_FEED') == 'fake':
+        return FakeFeed(failure_rate=float(os.environ.get('STOCK_AI_FAKE_FAILURE_RATE', 0)))
+    from tvDatafeed import TvDatafeedLive
+    return TvDatafeedLive(username, password)
+
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """Return the process-wide session manager, creating it on first use."""
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            _session_manager = SessionManager(default_factory, pool_size=int(os.environ.get('STOCK_AI_FEED_POOL', 1)))
+        return _session_manager
@@ -0,0 +1,279 @@
+import heapq
+import os
+import sqlite3
+import sys
+import threading
+from modules.archive import TradeArchive
+from utils.logging_utils import logging
+from utils.time_utils import format_time
+
+# Column order of the legacy *_Signal_system.csv files
+CSV_COLUMNS = ['Buy Time', 'Buy Price', 'Take Profit', 'Stop Loss', 'Close', 'Close Time', '%']
+
+# Ledger column for every signal record key
+RECORD_COLUMNS = {
+    'Buy Time': 'buy_time',
+    'Buy Price': 'buy_price',
+    'Take Profit': 'take_profit',
+    'Stop Loss': 'stop_loss',
+    'Close': 'close',
+    'Close Time': 'close_time',
+    '%': 'pct',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    buy_time TEXT NOT NULL UNIQUE,
+    buy_price REAL,
+    take_profit REAL,
+    stop_loss REAL,
+    close REAL,
+    close_time TEXT,
+    pct TEXT
+)
+"""
+
+META_SCHEMA = 'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)'
+
+
+def get_trade_ledger_file(signal_system_file):
+    """Return the ledger database that replaces the given *_Signal_system.csv file."""
+    return signal_system_file.replace('_Signal_system.csv', '_trades.db')
+
+
+def get_trade_archive_dir(signal_system_file):
+    """Return the directory of the day partitions closed trades are archived into."""
+    return signal_system_file.replace('_Signal_system.csv', '_trades_archive')
+
+
+def _value(value):
+    # SQLite cannot bind NumPy scalars or NaN-as-missing
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class TradeRecord:
+    """
+    One trade as the strategy tracks it: epoch-second times and float prices.
+    Times and the P&L are formatted only when the trade is written to the ledger.
+    """
+
+    __slots__ = ('buy_time', 'buy_price', 'take_profit', 'stop_loss', 'close', 'close_time')
+
+    def __init__(self, buy_time, buy_price, take_profit, stop_loss, close=None, close_time=None):
+        self.buy_time = buy_time
+        self.buy_price = buy_price
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.close = close
+        self.close_time = close_time
+
+    @property
+    def closed(self):
+        return self.close_time is not None
+
+    @property
+    def pct(self):
+        """Profit or loss in percent of the buy price, or None while the trade is open."""
+        if self.close is None:
+            return None
+        return (self.close - self.buy_price) / self.buy_price * 100
+
+    def close_at(self, price, time):
+        self.close = price
+        self.close_time = time
+
+    def values(self):
+        """Ledger column values, formatted like the legacy signal CSV."""
+        return {
+            'buy_time': format_time(self.buy_time),
+            'buy_price': _value(self.buy_price),
+            'take_profit': _value(self.take_profit),
+            'stop_loss': _value(self.stop_loss),
+            'close': _value(self.close),
+            'close_time': None if self.close_time is None else format_time(self.close_time),
+            'pct': None if self.close is None else f"{self.pct:.2f}%",
+        }
+
+
+class TradeLedger:
+    """
+    Trades of one symbol in SQLite (WAL mode), one row per trade with a stable id.
+
+    An in-memory index of what has been written (buy time -> id, closed) lets
+    upsert() skip unchanged records, insert new trades and update a trade in
+    place when it closes, so a tick costs O(changed trades) instead of O(history).
+
+    Closed trades bought before `archived_until` live in compressed day partitions
+    (see archive_before) and leave both the database and the index, so neither grows
+    with the age of the symbol; rows() merges them back in Buy Time order. Trades still
+    open stay in the database however old they are.
+    """
+
+    def __init__(self, path, archive_dir=None):
+        self.path = path
+        self.archive = TradeArchive(archive_dir or path.replace('_trades.db', '_trades_archive'))
+        self.lock = threading.RLock()  # One connection shared by the fetcher and UI threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(SCHEMA)
+            self.connection.execute(META_SCHEMA)
+        self.archived_until = self._archived_until(self.connection)
+        self.index = {buy_time: (trade_id, close_time is not None) for trade_id, buy_time, close_time in
+                      self.connection.execute('SELECT id, buy_time, close_time FROM trades')}
+
+    @staticmethod
+    def _archived_until(connection):
+        row = connection.execute("SELECT value FROM meta WHERE key = 'archived_until'").fetchone()
+        return None if row is None else row[0]
+
+    def __len__(self):
+        return len(self.index)
+
+    def trade_id(self, buy_time):
+        entry = self.index.get(buy_time)
+        return None if entry is None else entry[0]
+
+    def upsert(self, records):
+        """
+        Write TradeRecords (or dicts keyed like the signal CSV columns, as imported).
+        Returns the number of trades inserted or updated.
+        """
+        changed = 0
+        with self.lock, self.connection:
+            for record in records:
+                if isinstance(record, TradeRecord):
+                    values = record.values()
+                else:
+                    values = {column: _value(record.get(key)) for key, column in RECORD_COLUMNS.items()}
+                entry = self.index.get(values['buy_time'])
+                if entry is None and self.archived_until is not None and values['buy_time'] < self.archived_until:
+                    continue  # Closed and archived already
+                closed = values['close_time'] is not None
+                if entry is None:
+                    trade_id = self.connection.execute(
+                        'INSERT INTO trades (buy_time, buy_price, take_profit, stop_loss, close, close_time, pct) '
+                        'VALUES (:buy_time, :buy_price, :take_profit, :stop_loss, :close, :close_time, :pct)',
+                        values).lastrowid
+                elif closed and not entry[1]:
+                    trade_id = entry[0]
+                    self.connection.execute(
+                        'UPDATE trades SET close = :close, close_time = :close_time, pct = :pct WHERE id = :id',
+                        dict(values, id=trade_id))
+                else:
+                    continue  # Already written in this state
+                self.index[values['buy_time']] = (trade_id, closed)
+                changed += 1
+        return changed
+
+    def archive_before(self, cutoff):
+        """
+        Move closed trades bought before `cutoff` ('YYYY-MM-DD HH:MM:SS', taken back to the
+        start of its day) into the archive; open trades stay in the database, so an old one
+        does not hold the rest back, and are archived by a later call once they close.
+        The partitions are written first and the rows deleted in the same transaction that
+        advances `archived_until`, so readers never see a trade twice or not at all.
+        Returns the number of trades archived.
+        """
+        with self.lock:
+            cutoff = cutoff[:10] + ' 00:00:00'
+            rows = self.connection.execute(
+                'SELECT id, buy_time, buy_price, take_profit, stop_loss, close, close_time, pct FROM trades '
+                'WHERE buy_time < ? AND close_time IS NOT NULL ORDER BY buy_time', (cutoff,)).fetchall()
+            archived_until = max(cutoff, self.archived_until or cutoff)
+            if not rows and archived_until == self.archived_until:
+                return 0
+            self.archive.write(rows)
+            with self.connection:
+                self.connection.executemany('DELETE FROM trades WHERE id = ?', [(row[0],) for row in rows])
+                self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('archived_until', ?)",
+                                        (archived_until,))
+            for row in rows:
+                del self.index[row[1]]
+            self.archived_until = archived_until
+            return len(rows)
+
+    def rows(self, since=None, batch_size=500):
+        """
+        Yield trades as (id, *CSV_COLUMNS) tuples in Buy Time order, optionally only those
+        bought at or after `since`: archived trades merged with the database (which also
+        holds open trades older than the watermark). Reads stream through their own
+        connection in batches, so memory stays bounded and writers are not blocked
+        (WAL readers see a snapshot).
+        """
+        query = 'SELECT id, buy_time, buy_price, take_profit, stop_loss, close, close_time, pct FROM trades'
+        params = ()
+        if since is not None:
+            query += ' WHERE buy_time >= ?'
+            params = (since,)
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            connection.execute('BEGIN')  # One snapshot for the watermark and the trades
+            archived_until = self._archived_until(connection)
+            cursor = connection.execute(query + ' ORDER BY buy_time', params)
+            stored = (row for batch in iter(lambda: cursor.fetchmany(batch_size), []) for row in batch)
+            if archived_until is None or (since is not None and since >= archived_until):
+                yield from stored
+                return
+            # A trade archived while this snapshot was open can be in both; Buy Times are unique
+            last_buy_time = None
+            for row in heapq.merge(self.archive.rows(since, archived_until), stored, key=lambda row: row[1]):
+                if row[1] != last_buy_time:
+                    last_buy_time = row[1]
+                    yield row
+        finally:
+            connection.close()
+
+    def read(self):
+        """Return every trade as a DataFrame in the layout of the legacy signal CSV."""
+        import pandas as pd  # Kept out of module import; the combiner and ledger writes do not need it
+        return pd.DataFrame([row[1:] for row in self.rows()], columns=CSV_COLUMNS)
+
+    def import_csv(self, csv_file):
+        """Load a legacy *_Signal_system.csv; when a Buy Time repeats, its closed row wins."""
+        import pandas as pd
+        df = pd.read_csv(csv_file)
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        self.upsert(records)
+        logging.info(f"Imported {len(df)} signal rows from {csv_file} into {self.path}")
+
+    def export_csv(self, csv_file):
+        """Write the ledger out in the legacy *_Signal_system.csv format."""
+        df = self.read()
+        df.to_csv(csv_file, index=False)
+        logging.info(f"Exported {len(df)} trades from {self.path} to {csv_file}")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+_open_ledgers = {}
+_open_ledgers_lock = threading.Lock()
+
+
+def open_trade_ledger(signal_system_file):
+    """
+    Open the trade ledger for a signal system file, migrating the legacy CSV on first use.
+    Threads of a process share one instance per ledger.
+    """
+    path = get_trade_ledger_file(signal_system_file)
+    with _open_ledgers_lock:
+        ledger = _open_ledgers.get(path)
+        if ledger is None:
+            ledger = TradeLedger(path, get_trade_archive_dir(signal_system_file))
+            if len(ledger) == 0 and ledger.archived_until is None and os.path.exists(signal_system_file):
+                ledger.import_csv(signal_system_file)
+            _open_ledgers[path] = ledger
+    return ledger
+
+
+if __name__ == '__main__':
+    # Usage: python -m modules.trade_ledger data/BTC_USD_Signal_system.csv [export.csv]
+    signal_system_file = sys.argv[1]
+    export_file = sys.argv[2] if len(sys.argv) > 2 else signal_system_file
+    open_trade_ledger(signal_system_file).export_csv(export_file)
@@ -0,0 +1,119 @@
+import csv
+import heapq
+import json
+import os
+from modules.trade_ledger import CSV_COLUMNS, get_trade_ledger_file, open_trade_ledger
+from utils.logging_utils import logging
+from utils.storage import atomic_write
+
+# Column order of data/result.csv
+RESULT_COLUMNS = ['PAIR'] + CSV_COLUMNS
+
+
+def get_watermark_file(result_file):
+    return f"{result_file}.watermark.json"
+
+
+def ledger_sources(targets, data_dir='data'):
+    """Return (title, signal_system_file) for every target that has trades."""
+    sources = []
+    for row in targets:
+        signal_system_file = os.path.join(data_dir, f"{row['Filename']}_Signal_system.csv")
+        if os.path.exists(signal_system_file) or os.path.exists(get_trade_ledger_file(signal_system_file)):
+            sources.append((row['Title'], signal_system_file))
+        else:
+            print(f"Warning: {signal_system_file} does not exist.")
+    return sources
+
+
+def iter_combined_trades(sources, since=None):
+    """
+    K-way merge of the per-symbol ledgers, which are each read in Buy Time order.
+    Yields (PAIR, *CSV_COLUMNS) rows sorted by Buy Time while holding one batch per ledger.
+    """
+    def pair_rows(title, signal_system_file):
+        for row in open_trade_ledger(signal_system_file).rows(since):
+            yield (title,) + row[1:]
+
+    return heapq.merge(*(pair_rows(title, signal_system_file) for title, signal_system_file in sources),
+                       key=lambda row: row[1])
+
+
+def write_combined_trades(sources, result_file):
+    """Stream every trade of every ledger into one CSV sorted by Buy Time; returns the row count."""
+    with atomic_write(result_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(RESULT_COLUMNS)
+        count = 0
+        for row in iter_combined_trades(sources):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _has_trades(signal_system_file):
+    rows = open_trade_ledger(signal_system_file).rows()
+    try:
+        return next(rows, None) is not None
+    finally:
+        rows.close()
+
+
+def update_combined_trades(sources, result_file):
+    """
+    Bring result_file up to date, merging in only the trades at or after the last watermark.
+
+    Every pair keeps its own watermark: the Buy Time of its oldest trade that was still
+    open (or else its newest trade) at the previous run, together with the byte offset of
+    the first row at that Buy Time. A run resumes from the oldest of them, so a pair that
+    lags behind the others still gets the trades it backfills merged. Rows before it are
+    final, so the file is truncated there and only the tail is rewritten. A missing file,
+    a changed set of pairs or a pair that had no trades before and has some now falls back
+    to a full rebuild, which is written atomically. An interrupted incremental run leaves
+    the watermark untouched, so the next run truncates at the same offset and repairs the tail.
+    """
+    watermark_file = get_watermark_file(result_file)
+    pairs = [title for title, _ in sources]
+    watermark = None
+    if os.path.exists(result_file) and os.path.exists(watermark_file):
+        with open(watermark_file, 'r') as f:
+            watermark = json.load(f)
+        marks = watermark.get('watermarks') or {}
+        if watermark.get('pairs') != pairs or set(marks) != set(pairs) or \
+                any(marks[title] is None and _has_trades(signal_system_file) for title, signal_system_file in sources):
+            watermark = None
+        else:
+            watermark = min((mark for mark in marks.values() if mark is not None),
+                            key=lambda mark: mark['buy_time'], default=None)
+        if watermark is not None and watermark['offset'] > os.path.getsize(result_file):
+            watermark = None
+
+    since = watermark['buy_time'] if watermark else None
+    with (open(result_file, 'r+', newline='') if watermark else atomic_write(result_file, 'w', newline='')) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        if watermark:
+            f.seek(watermark['offset'])
+            f.truncate()
+        else:
+            writer.writerow(RESULT_COLUMNS)
+
+        count = 0
+        group_time, group_offset = None, f.tell()  # Offset of the first row at the current Buy Time
+        marks = {}
+        has_open = set()
+        for row in iter_combined_trades(sources, since):
+            title, buy_time, close_time = row[0], row[1], row[6]
+            if buy_time != group_time:
+                f.flush()
+                group_time, group_offset = buy_time, f.tell()
+            if title not in has_open:
+                marks[title] = {'buy_time': buy_time, 'offset': group_offset}
+                if close_time is None:
+                    has_open.add(title)
+            writer.writerow(row)
+            count += 1
+
+    with atomic_write(watermark_file) as f:
+        json.dump({'pairs': pairs, 'watermarks': {title: marks.get(title) for title in pairs}}, f)
+    logging.info(f"Merged {count} trades at or after {since or 'the beginning'} into {result_file}")
+    return count
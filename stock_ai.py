@@ -3,10 +3,12 @@ from threading import Thread
 from modules.chart_drawer import draw_chart, update_chart_and_indicators
 from modules.data_fetcher import start_data_fetching
 from utils.file_utils import setup_file_paths, get_strategy_config_file
+from utils.metrics import start_metrics_reporting
 import sys
 
 def main(symbol, exchange, title, filename):
     logging.info("Starting the application...")
+    start_metrics_reporting()
     print(f"Received parameters: symbol={symbol}, exchange={exchange}, title={title}, filename={filename}")
     # Set up file paths based on the given filename, symbol, and exchange
     ohlcv_file, signal_system_file = setup_file_paths(filename, symbol, exchange)
@@ -15,10 +17,10 @@ def main(symbol, exchange, title, filename):
     strategy_config_file = get_strategy_config_file()
 
     # Initialize the chart with the provided title
-    chart, rsi_line, macd_line, macd_signal_line, macd_histogram_series, stochrsi_k_line, stochrsi_d_line = draw_chart(title, ohlcv_file)
+    chart, series = draw_chart(title, ohlcv_file)
 
     # Start the update thread for the chart indicators
-    update_thread = Thread(target=update_chart_and_indicators, args=(chart, rsi_line, macd_line, macd_signal_line, macd_histogram_series, stochrsi_k_line, stochrsi_d_line, ohlcv_file))
+    update_thread = Thread(target=update_chart_and_indicators, args=(chart, series, ohlcv_file))
     update_thread.start()
 
     # Start data fetching for the given symbol and exchange
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from modules.bar_store import CHART_COLUMNS, COLUMNS, BarStore
+from utils.storage import StoreLockedError, WriterLock
+
+STEP = 60
+
+
+def bars(start, count, version=0):
+    """Bars whose every chart column holds time + version, so a row mixing two writes stands out."""
+    times = np.arange(start, start + count * STEP, STEP, dtype=np.int64)
+    frame = pd.DataFrame({'time': times})
+    for column in CHART_COLUMNS:
+        frame[column] = times + version
+    return frame
+
+
+def block(frame):
+    return {column: frame[column].to_numpy(dtype=dtype) if column in frame else np.zeros(len(frame), dtype=dtype)
+            for column, dtype in COLUMNS.items()}
+
+
+def call_with_timeout(func, timeout=5):
+    """Run func in a thread; fail instead of hanging the suite if it never returns."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=func()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'store read did not return'
+    return result['value']
+
+
+def crash_mid_write(path, start, frame, legacy=False):
+    """Leave the store as a writer killed after its WAL and odd generation, before the column files."""
+    store = BarStore(path)
+    store.writer_lock.acquire()
+    if legacy:
+        entry = {'start': start, 'interval': '1m', 'history_version': store.history_version,
+                 'columns': {column: values.tolist() for column, values in block(frame).items()}}
+        with open(store.wal_file, 'w') as f:
+            json.dump(entry, f)
+    else:
+        store._write_wal(start, block(frame), '1m', store.history_version)
+    store._save_meta(dict(store.meta, generation=store.meta['generation'] | 1))
+    store.close()
+
+
+def assert_rows_consistent(df):
+    values = df[CHART_COLUMNS].to_numpy()
+    assert (values == values[:, :1]).all(), 'torn row'
+    assert (np.diff(df['time'].to_numpy()) == STEP).all(), 'missing or duplicated bar'
+
+
+def test_readers_never_see_torn_rows(tmp_path):
+    writer = BarStore(str(tmp_path))
+    writer.upsert(bars(0, 50), interval='1m')
+    reader = BarStore(str(tmp_path))
+    done = threading.Event()
+    errors = []
+
+    def write():
+        try:
+            # Each write rewrites the last 20 bars at a new version and appends 5
+            for version in range(1, 200):
+                last = writer.last_time()
+                writer.upsert(bars(last - 19 * STEP, 25, version), interval='1m')
+        except Exception as error:
+            errors.append(error)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    reads = 0
+    while not done.is_set():
+        df = reader.read()
+        assert_rows_consistent(df)
+        assert len(df) >= 50
+        reads += 1
+    thread.join()
+    assert not errors
+    assert reads > 0
+    final = reader.read()
+    assert_rows_consistent(final)
+    assert len(final) == 50 + 199 * 5
+
+
+def test_interrupted_clear_is_finished_on_open(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.upsert(bars(0, 10), interval='1m')
+    store.close()
+    # Killed inside clear(): odd generation, column files partly removed, no WAL
+    meta_file = os.path.join(str(tmp_path), 'meta.json')
+    with open(meta_file) as f:
+        meta = json.load(f)
+    with open(meta_file, 'w') as f:
+        json.dump(dict(meta, generation=meta['generation'] | 1), f)
+    os.remove(os.path.join(str(tmp_path), 'close.bin'))
+
+    reopened = call_with_timeout(lambda: BarStore(str(tmp_path)))
+    assert call_with_timeout(reopened.last_time) is None
+    assert len(reopened) == 0
+    assert reopened.generation % 2 == 0
+    assert reopened.interval is None
+
+
+def test_reader_finishes_interrupted_clear(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.upsert(bars(0, 10), interval='1m')
+    reader = BarStore(str(tmp_path))
+    store._save_meta(dict(store.meta, generation=store.meta['generation'] | 1))
+    store.close()  # The writer dies before removing the column files
+
+    assert call_with_timeout(reader.last_time) is None
+    assert reader.generation % 2 == 0
+
+
+@pytest.mark.parametrize('legacy', [False, True], ids=['npz', 'json'])
+def test_wal_is_replayed_after_crash(tmp_path, legacy):
+    store = BarStore(str(tmp_path))
+    store.upsert(bars(0, 10), interval='1m')
+    store.close()
+    crash_mid_write(str(tmp_path), 8, bars(8 * STEP, 5, version=1), legacy=legacy)
+
+    reopened = BarStore(str(tmp_path))
+    assert not os.path.exists(reopened.wal_file)
+    assert reopened.generation % 2 == 0
+    df = reopened.read()
+    assert_rows_consistent(df)
+    assert len(df) == 13
+    assert (df['close'].to_numpy()[8:] == df['time'].to_numpy()[8:] + 1).all()
+    assert (df['close'].to_numpy()[:8] == df['time'].to_numpy()[:8]).all()
+
+
+def test_wal_written_before_odd_generation_is_replayed(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.upsert(bars(0, 3), interval='1m')
+    store._write_wal(3, block(bars(3 * STEP, 2)), '1m', store.history_version)
+    store.close()  # Killed before the odd generation reached disk
+
+    reopened = BarStore(str(tmp_path))
+    assert len(reopened) == 5
+    assert_rows_consistent(reopened.read())
+
+
+def test_reader_waits_for_live_writer(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.upsert(bars(0, 3), interval='1m')
+    store._write_wal(3, block(bars(3 * STEP, 2)), '1m', store.history_version)
+    store._save_meta(dict(store.meta, generation=store.meta['generation'] | 1))
+    # The writer still holds the lock, so the reader must not replay its WAL
+    reader = BarStore(str(tmp_path))
+    assert os.path.exists(store.wal_file)
+    timer = threading.Timer(0.2, lambda: store._replay_wal())
+    timer.start()
+    assert call_with_timeout(reader.last_time) == 4 * STEP
+    timer.join()
+
+
+def test_single_writer(tmp_path):
+    first = BarStore(str(tmp_path))
+    second = BarStore(str(tmp_path))
+    first.upsert(bars(0, 3), interval='1m')
+    with pytest.raises(StoreLockedError, match=str(os.getpid())):
+        second.upsert(bars(3 * STEP, 1), interval='1m')
+    first.close()
+    second.upsert(bars(3 * STEP, 1), interval='1m')
+    assert len(first) == 4
+
+
+def test_writer_lock_is_released_with_its_holder(tmp_path):
+    path = str(tmp_path / 'writer.lock')
+    lock = WriterLock(path).acquire()
+    assert lock.acquire() is lock
+    with pytest.raises(StoreLockedError):
+        WriterLock(path).acquire()
+    lock.release()
+    other = WriterLock(path).acquire()
+    assert other.held
+    other.release()
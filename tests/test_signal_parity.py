@@ -0,0 +1,120 @@
+import glob
+import json
+import os
+import pandas as pd
+import pytest
+from modules.bar_store import SIGNAL_NAMES, Signal, from_csv_frame
+from utils.time_utils import format_time
+from utils.trading_strategy import TradingStrategy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OHLCV_FILES = sorted(glob.glob(os.path.join(ROOT, 'data', '*_Real_Time_OHLCV.csv')))
+
+# Take-profit/stop-loss levels no bar reaches: the baseline loop only closed trades on signals
+CONFIG = {'take_profit': 1e6, 'stop_loss': 100.0}
+
+
+class MarkerLog:
+    def __init__(self):
+        self.markers = []
+
+    def marker(self, **kwargs):
+        self.markers.append(kwargs)
+
+
+def baseline_signals(strategy, new_data, signal_records):
+    """The per-row loop of the original generate_signals, without its file writes."""
+    trade_open = any(record['Close'] is None for record in signal_records)
+    for i in range(1, len(new_data)):
+        stochrsi_tendency_up = new_data.loc[i, 'stochrsi_K'] > new_data.loc[i-1, 'stochrsi_K']
+        stochrsi_tendency_down = new_data.loc[i, 'stochrsi_K'] < new_data.loc[i-1, 'stochrsi_K']
+        rsi_tendency_up = new_data.loc[i, 'rsi'] > new_data.loc[i-1, 'rsi']
+        rsi_tendency_down = new_data.loc[i, 'rsi'] < new_data.loc[i-1, 'rsi']
+
+        stochrsi_range_up = new_data.loc[i, 'stochrsi_K'] < strategy.stochrsi_overbought
+        stochrsi_range_down = new_data.loc[i, 'stochrsi_K'] > strategy.stochrsi_oversold
+        rsi_range_up = new_data.loc[i, 'rsi'] < strategy.rsi_overbought
+        rsi_range_down = new_data.loc[i, 'rsi'] > strategy.rsi_oversold
+
+        open_trade_condition = (stochrsi_tendency_up and rsi_tendency_up and stochrsi_range_up and rsi_range_up) or \
+            (new_data.loc[i, 'macd'] > new_data.loc[i, 'macd_signal'] and new_data.loc[i-1, 'macd'] <= new_data.loc[i-1, 'macd_signal'])
+        close_trade_condition = (stochrsi_tendency_down and rsi_tendency_down and stochrsi_range_down and rsi_range_down) or \
+            (new_data.loc[i, 'macd'] < new_data.loc[i, 'macd_signal'] and new_data.loc[i-1, 'macd'] >= new_data.loc[i-1, 'macd_signal'])
+
+        if open_trade_condition and not trade_open:
+            new_data.loc[i, 'signal'] = 'Open Trade'
+            trade_open = True
+            entry_price = new_data.loc[i, 'close']
+            signal_records.append({
+                'Buy Time': new_data.loc[i, 'date'],
+                'Buy Price': entry_price,
+                'Take Profit': entry_price + (entry_price * (strategy.take_profit / 100)),
+                'Stop Loss': entry_price - (entry_price * (strategy.stop_loss / 100)),
+                'Close': None,
+                'Close Time': None
+            })
+        elif close_trade_condition and trade_open:
+            new_data.loc[i, 'signal'] = 'Close Trade'
+            trade_open = False
+            for signal in signal_records:
+                if signal['Close'] is None:
+                    signal['Close'] = new_data.loc[i, 'close']
+                    signal['Close Time'] = new_data.loc[i, 'date']
+                    profit_loss = (signal['Close'] - signal['Buy Price']) / signal['Buy Price'] * 100
+                    signal['%'] = f"{profit_loss:.2f}%"
+                    break
+    return new_data
+
+
+def load_bars(ohlcv_file, strategy):
+    bars = from_csv_frame(pd.read_csv(ohlcv_file)).drop(columns='signal')
+    return strategy.calculate_indicators(bars)
+
+
+@pytest.fixture
+def strategy_config(tmp_path):
+    with open(os.path.join(ROOT, 'config', 'strategy_config.json')) as f:
+        config = dict(json.load(f), **CONFIG)
+    config_file = tmp_path / 'strategy_config.json'
+    config_file.write_text(json.dumps(config))
+    return str(config_file)
+
+
+def run_both(strategy_config, ohlcv_file, chunk):
+    """Feed the bars in chunks of `chunk` to apply_signals and to the baseline loop."""
+    strategy = TradingStrategy(strategy_config)
+    bars = load_bars(ohlcv_file, strategy)
+    chart = MarkerLog()
+    signals, baseline, records = [], [], []
+    for start in range(0, len(bars), chunk):
+        new_data = bars.iloc[start:start + chunk].reset_index(drop=True).assign(signal=Signal.HOLD)
+        strategy.apply_signals(new_data, chart)
+        signals.extend(SIGNAL_NAMES[Signal(code)] for code in new_data['signal'])
+
+        legacy = new_data.drop(columns='signal').assign(date=[format_time(t) for t in new_data['time']],
+                                                        signal='Hold')
+        baseline.extend(baseline_signals(strategy, legacy, records)['signal'])
+    return strategy, signals, baseline, records
+
+
+@pytest.mark.parametrize('chunk', [10 ** 6, 37])
+@pytest.mark.parametrize('ohlcv_file', OHLCV_FILES, ids=os.path.basename)
+def test_signals_match_baseline_loop(strategy_config, ohlcv_file, chunk):
+    strategy, signals, baseline, records = run_both(strategy_config, ohlcv_file, chunk)
+    assert signals == baseline
+    assert len(strategy.signal_records) == len(records)
+    for record, expected in zip(strategy.signal_records, records):
+        assert format_time(record.buy_time) == expected['Buy Time']
+        assert record.buy_price == expected['Buy Price']
+        assert record.take_profit == pytest.approx(expected['Take Profit'])
+        assert record.stop_loss == pytest.approx(expected['Stop Loss'])
+        assert record.close == expected['Close']
+        assert (None if record.close_time is None else format_time(record.close_time)) == expected['Close Time']
+        if record.closed:
+            assert f"{record.pct:.2f}%" == expected['%']
+
+
+def test_data_files_produce_trades(strategy_config):
+    # Guard against a vacuous parity check
+    assert OHLCV_FILES
+    assert any(run_both(strategy_config, ohlcv_file, 10 ** 6)[3] for ohlcv_file in OHLCV_FILES)
@@ -4,9 +4,7 @@ import json
 import webbrowser
 from datetime import datetime
 import os
-from tvDatafeed import Interval as TVInterval
 import csv
-from PIL import Image, ImageTk
 
 class TradingAppUI:
     def __init__(self):
@@ -153,6 +151,9 @@ class TradingAppUI:
         right_panel.pack(side="right", fill="both", expand=True, padx=5)
         
         try:
+            # PIL is only needed for the logo, so it is imported here rather than at startup
+            from PIL import Image, ImageTk
+
             # Load and resize the image
             image = Image.open('assets/trading-logo.png')
             desired_width = 350  # Slightly smaller width
@@ -189,14 +190,6 @@ class TradingAppUI:
                     justify='center').pack()
         
     
-    def signal_config_change(self,symbol):
-        """Create a flag file to signal configuration change for a specific symbol"""
-        flag_file = os.path.join('config', f'{symbol}_config_changed.flag')
-        try:
-            with open(flag_file, 'w') as f:
-                f.write('1')
-        except Exception as e:
-            print(f"Error creating flag file: {e}")  
     def load_config(self):
         try:
             with open(os.path.join('config', 'strategy_config.json'), 'r') as f:
@@ -208,23 +201,23 @@ class TradingAppUI:
             print(f"Error loading config: {e}")
 
     def save_config(self):
-        config = {
+        # Only the fields of this window change; tuned indicator periods and levels
+        # (e.g. an applied optimizer candidate) are kept from the current config
+        from modules.config_service import save_config, DEFAULT_CONFIG
+        config_file = os.path.join('config', 'strategy_config.json')
+        try:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = dict(DEFAULT_CONFIG)
+        config.update({
             "take_profit": float(self.take_profit_var.get()),
             "stop_loss": float(self.stop_loss_var.get()),
             "interval": self.interval_var.get(),
-            "rsi_period": 14,
-            "stochrsi_period": 14,
-            "macd_fast_period": 12,
-            "macd_slow_period": 26,
-            "macd_signal_period": 9,
-            "rsi_overbought": 70,
-            "rsi_oversold": 30,
-            "stochrsi_overbought": 80,
-            "stochrsi_oversold": 20
-        }
-        
-        with open(os.path.join('config', 'strategy_config.json'), 'w') as f:
-            json.dump(config, f, indent=2)
+        })
+
+        # Running symbols pick the change up from the config watcher
+        save_config(config_file, config)
         
         self.update_status("Configuration saved successfully")
 
@@ -247,11 +240,6 @@ class TradingAppUI:
     
     def apply_changes(self):
         self.save_config()
-        with open(os.path.join('config', 'targets.csv'), mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                symbol = row['Symbol']
-                self.signal_config_change(symbol)
         self.update_status("Changes applied successfully")
     
     def on_interval_change(self):
@@ -268,9 +256,12 @@ class TradingAppUI:
         
         os.makedirs('exports', exist_ok=True)
         
-        if os.path.exists(os.path.join('data', 'result.csv')):
-            import shutil
-            shutil.copy2(os.path.join('data', 'result.csv'), export_path)
+        # Merge the ledgers straight into the export instead of copying a combined file
+        from modules.trade_results import ledger_sources, write_combined_trades
+        with open(os.path.join('config', 'targets.csv'), mode='r') as file:
+            sources = ledger_sources(csv.DictReader(file))
+        if sources:
+            write_combined_trades(sources, export_path)
             webbrowser.open(export_path)
             self.update_status(f"Results exported to {export_path}")
         else:
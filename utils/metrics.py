@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from utils.logging_utils import logging
+
+# Recent samples kept per (symbol, stage); percentiles are computed over this window
+STAGE_SAMPLES = 2048
+
+PERCENTILES = (50, 95, 99)
+
+# Returned by timer() while metrics are disabled, so an instrumented stage costs one call
+_DISABLED_TIMER = nullcontext()
+
+
+def metrics_label(ohlcv_file):
+    """Symbol label used in metrics, e.g. 'BTC_USD' for data/BTC_USD_Real_Time_OHLCV.csv."""
+    return os.path.basename(ohlcv_file).replace('_Real_Time_OHLCV.csv', '')
+
+
+class StageStats:
+    """Count, total and maximum of a stage's durations plus a window of recent samples."""
+
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=STAGE_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        """Durations in milliseconds; percentiles use the nearest rank over the recent window."""
+        samples = sorted(self.samples)
+        summary = {'count': self.count, 'mean_ms': self.total / self.count * 1000, 'max_ms': self.max * 1000}
+        for p in PERCENTILES:
+            rank = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+            summary[f"p{p}_ms"] = samples[rank] * 1000
+        return summary
+
+
+class _Timer:
+    __slots__ = ('metrics', 'symbol', 'stage', 'started')
+
+    def __init__(self, metrics, symbol, stage):
+        self.metrics = metrics
+        self.symbol = symbol
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.symbol, self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Per-symbol stage timers and counters for the tick pipeline.
+
+    Usage: `with metrics.timer(symbol, 'fetch'): ...`. While disabled, timer() returns
+    a shared no-op context manager and count() returns immediately.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}  # (symbol, stage) -> StageStats
+        self.counters = {}  # (symbol, name) -> int
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def timer(self, symbol, stage):
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return _Timer(self, symbol, stage)
+
+    def observe(self, symbol, stage, seconds):
+        with self.lock:
+            stats = self.stages.get((symbol, stage))
+            if stats is None:
+                stats = self.stages[(symbol, stage)] = StageStats()
+            stats.add(seconds)
+
+    def count(self, symbol, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(symbol, name)] = self.counters.get((symbol, name), 0) + n
+
+    def snapshot(self):
+        """
+        Return {'symbols': {symbol: {'stages': {stage: summary}, 'counters': {...}}}} plus pid/time,
+        and the IndicatorCache stats and feed health_check() once the process uses them.
+        """
+        with self.lock:
+            stages = {key: stats.summary() for key, stats in self.stages.items()}
+            counters = dict(self.counters)
+        symbols = {}
+        for (symbol, stage), summary in stages.items():
+            symbols.setdefault(symbol, {'stages': {}, 'counters': {}})['stages'][stage] = summary
+        for (symbol, name), value in counters.items():
+            symbols.setdefault(symbol, {'stages': {}, 'counters': {}})['counters'][name] = value
+        snapshot = {'time': time.time(), 'pid': os.getpid(), 'uptime': time.time() - self.started, 'symbols': symbols}
+        # Only once something has imported them; importing them here would pull pandas into every process
+        cache = sys.modules.get('indicators.cache')
+        if cache is not None:
+            snapshot['indicator_cache'] = cache.indicator_cache.stats()
+        sessions = sys.modules.get('modules.session_manager')
+        if sessions is not None and sessions._session_manager is not None:
+            snapshot['feed'] = sessions._session_manager.health_check()
+        return snapshot
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def start_dump(self, path, interval=60.0):
+        """Append a JSON snapshot line to `path` every `interval` seconds from a daemon thread."""
+        def dump():
+            while True:
+                time.sleep(interval)
+                try:
+                    with open(path, 'a') as f:
+                        f.write(json.dumps(self.snapshot()) + '\n')
+                except OSError as e:
+                    logging.error(f"Could not write metrics to {path}: {e}")
+
+        thread = threading.Thread(target=dump, name='metrics-dump', daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve the current snapshot as JSON at http://host:port/metrics from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the application log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+
+# Process-wide registry; STOCK_AI_METRICS=1 turns it on
+metrics = Metrics(enabled=os.environ.get('STOCK_AI_METRICS') == '1')
+
+_reporting_started = False
+
+
+def start_metrics_reporting():
+    """
+    Start the reporters configured by the environment, once per process:
+    STOCK_AI_METRICS_FILE / STOCK_AI_METRICS_DUMP (JSON lines every N seconds, default
+    data/metrics.jsonl every 60s) and STOCK_AI_METRICS_PORT (local /metrics endpoint, served
+    by whichever process binds it first).
+    """
+    global _reporting_started
+    if not metrics.enabled or _reporting_started:
+        return
+    _reporting_started = True
+    dump_file = os.environ.get('STOCK_AI_METRICS_FILE', os.path.join('data', 'metrics.jsonl'))
+    metrics.start_dump(dump_file, float(os.environ.get('STOCK_AI_METRICS_DUMP', 60)))
+    logging.info(f"Writing pipeline metrics to {dump_file}")
+    port = os.environ.get('STOCK_AI_METRICS_PORT')
+    if port:
+        # Per-symbol processes inherit the port; only the first to bind serves, the rest still dump
+        try:
+            metrics.serve(int(port))
+        except OSError as e:
+            logging.warning(f"Not serving metrics from pid {os.getpid()}, port {port} is unavailable: {e}")
+            return
+        logging.info(f"Serving pipeline metrics at http://127.0.0.1:{port}/metrics")
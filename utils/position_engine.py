@@ -0,0 +1,68 @@
+import itertools
+import numpy as np
+
+
+class Position:
+    """An open long position with its take-profit/stop-loss levels."""
+
+    __slots__ = ('id', 'entry_time', 'entry_price', 'take_profit', 'stop_loss', 'record')
+
+    def __init__(self, id, entry_time, entry_price, take_profit, stop_loss, record=None):
+        self.id = id
+        self.entry_time = entry_time
+        self.entry_price = entry_price
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.record = record  # The signal record this position closes, if any
+
+
+def bar_fill(position, open_, high, low):
+    """
+    Return (price, reason) if the bar hits the position's levels, else None.
+    A bar that opens through a level fills at the open (gap). When the bar touches
+    both levels the stop is assumed to fill first, since the intrabar order is unknown.
+    """
+    if open_ <= position.stop_loss:
+        return open_, 'Stop Loss'
+    if open_ >= position.take_profit:
+        return open_, 'Take Profit'
+    if low <= position.stop_loss:
+        return position.stop_loss, 'Stop Loss'
+    if high >= position.take_profit:
+        return position.take_profit, 'Take Profit'
+    return None
+
+
+class PositionEngine:
+    """
+    Tracks the open positions of one symbol and closes them at take-profit/stop-loss.
+    first_exit() checks a block of bars with NumPy.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def open(self, entry_time, entry_price, take_profit, stop_loss, record=None):
+        position = Position(next(self.ids), entry_time, entry_price, take_profit, stop_loss, record)
+        self.positions[position.id] = position
+        return position
+
+    def close(self, position):
+        self.positions.pop(position.id, None)
+
+    def first_exit(self, position, opens, highs, lows, start=0, stop=None):
+        """
+        Return (index, price, reason) of the first bar in [start, stop) that hits the
+        position's levels, or None. Vectorized, so a long stretch of bars costs no Python loop.
+        """
+        window = slice(start, len(lows) if stop is None else stop)
+        hits = (lows[window] <= position.stop_loss) | (highs[window] >= position.take_profit)
+        if not hits.any():
+            return None
+        index = start + int(np.argmax(hits))
+        price, reason = bar_fill(position, opens[index], highs[index], lows[index])
+        return index, price, reason
@@ -0,0 +1,100 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StoreLockedError(RuntimeError):
+    """Raised when another process already holds the single-writer lock of a store."""
+
+
+def fsync_dir(directory):
+    """Flush a directory entry (e.g. after a rename) to disk; a no-op where directories cannot be opened."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_file(f):
+    """Flush a file object's buffers and its data to disk."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+@contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    """
+    Write `path` through a temporary sibling that is fsynced and renamed over it, so readers
+    and a crash only ever see the old or the new content. Nothing is replaced if the block raises.
+    """
+    tmp_file = f"{path}.tmp"
+    try:
+        with open(tmp_file, mode, **kwargs) as f:
+            yield f
+            fsync_file(f)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+class WriterLock:
+    """
+    Non-blocking exclusive lock on a lock file, shared by every process that writes a store.
+    The holder's pid is written into the file so a refused writer can say who holds it.
+    The OS releases the lock if the holder dies, so a crash never leaves a store locked.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    @property
+    def held(self):
+        return self.file is not None
+
+    def acquire(self):
+        if self.file is not None:
+            return self
+        f = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.seek(0)
+            holder = f.read().strip() or 'unknown'
+            f.close()
+            raise StoreLockedError(f"{self.path} is held by another writer (pid {holder})")
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self.file = f
+        return self
+
+    def release(self):
+        if self.file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def format_time(time):
+    """Format one epoch time like the dates of the legacy CSV files (no pandas/NumPy, so it is cheap to import)."""
+    return datetime.fromtimestamp(int(time), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
@@ -1,9 +1,48 @@
-import pandas as pd
-from indicators.rsi import RSI
-from indicators.macd import calculate_macd
-from indicators.stochrsi import StochRSI
+import numpy as np
+from indicators.cache import data_key, indicator_cache
+from indicators.registry import IndicatorGraph, strategy_requests
+from indicators.streaming import IndicatorEngine
+from utils.position_engine import PositionEngine
+from modules.trade_ledger import TradeRecord, open_trade_ledger
+from modules.bar_store import Signal
+from utils.time_utils import format_time
 import json
 import logging
+import os
+
+# Closed trades kept in signal_records; older ones are only in the ledger and its archive
+MAX_CLOSED_RECORDS = 100
+
+def compute_signal_conditions(stochrsi_k, rsi, macd, macd_signal, rsi_overbought=70, rsi_oversold=30,
+                              stochrsi_overbought=80, stochrsi_oversold=20):
+    """Vectorized open/close trade conditions over indicator arrays (shared by live trading and backtests)."""
+    open_trade_condition = np.zeros(len(rsi), dtype=bool)
+    close_trade_condition = np.zeros(len(rsi), dtype=bool)
+    if len(rsi) < 2:
+        return open_trade_condition, close_trade_condition
+
+    k, k_prev = stochrsi_k[1:], stochrsi_k[:-1]
+    r, r_prev = rsi[1:], rsi[:-1]
+    m, m_prev = macd[1:], macd[:-1]
+    s, s_prev = macd_signal[1:], macd_signal[:-1]
+
+    stochrsi_tendency_up = k > k_prev
+    stochrsi_tendency_down = k < k_prev
+    rsi_tendency_up = r > r_prev
+    rsi_tendency_down = r < r_prev
+
+    stochrsi_range_up = k < stochrsi_overbought
+    stochrsi_range_down = k > stochrsi_oversold
+    rsi_range_up = r < rsi_overbought
+    rsi_range_down = r > rsi_oversold
+
+    macd_cross_up = (m > s) & (m_prev <= s_prev)
+    macd_cross_down = (m < s) & (m_prev >= s_prev)
+
+    open_trade_condition[1:] = (stochrsi_tendency_up & rsi_tendency_up & stochrsi_range_up & rsi_range_up) | macd_cross_up
+    close_trade_condition[1:] = (stochrsi_tendency_down & rsi_tendency_down & stochrsi_range_down & rsi_range_down) | macd_cross_down
+    return open_trade_condition, close_trade_condition
+
 
 class TradingStrategy:
     def __init__(self, config_file):
@@ -11,6 +50,16 @@ class TradingStrategy:
         with open(config_file, 'r') as f:
             config = json.load(f)
         
+        self.trade_open = False
+        self.entry_price = None
+        self.signal_records = []
+        self.pending_records = []  # Records opened or closed since the last ledger write
+        self.last_signal_time = None  # Epoch time of the newest bar run through apply_signals
+        self.indicator_engine = None
+        self.position_engine = PositionEngine()
+        self._set_params(config)
+
+    def _set_params(self, config):
         self.take_profit = config.get('take_profit', 2.0)
         self.stop_loss = config.get('stop_loss', 1.0)
         self.rsi_period = config.get('rsi_period', 14)
@@ -18,9 +67,6 @@ class TradingStrategy:
         self.macd_fast_period = config.get('macd_fast_period', 12)
         self.macd_slow_period = config.get('macd_slow_period', 26)
         self.macd_signal_period = config.get('macd_signal_period', 9)
-        self.trade_open = False
-        self.entry_price = None
-        self.signal_records = []
 
         # Default RSI and StochRSI ranges
         self.rsi_overbought = config.get('rsi_overbought', 70)
@@ -28,112 +74,202 @@ class TradingStrategy:
         self.stochrsi_overbought = config.get('stochrsi_overbought', 80)
         self.stochrsi_oversold = config.get('stochrsi_oversold', 20)
 
+    def apply_config(self, config, closes=None):
+        """
+        Switch to new parameters in place, keeping open trades and signal records.
+        TP/SL changes apply to trades opened from now on. If indicator periods changed,
+        only the affected streaming indicators are rebuilt by replaying `closes` (all bars
+        processed so far); returns {column: values} for those bars, or {} if nothing was recomputed.
+        """
+        self._set_params(config)
+        if self.indicator_engine is None:
+            return {}
+        params = self._new_indicator_engine().params
+        if params == self.indicator_engine.params:
+            return {}
+        if closes is None:
+            self.indicator_engine = None  # Re-warm from a full fetch with the new periods
+            return {}
+        return self.indicator_engine.reconfigure(closes, **params)
+
     def calculate_indicators(self, df):
         # Ensure there is enough data to calculate indicators
         if len(df) < max(self.rsi_period, self.macd_slow_period, self.stochrsi_period):
             logging.error(f"Not enough data to calculate indicators. Required: {max(self.rsi_period, self.macd_slow_period, self.stochrsi_period)}, Available: {len(df)}")
             return df  # Return the DataFrame as is without adding indicators
         
-        # Calculate indicators based on the set periods
-        df['rsi'] = RSI(df['close'], self.rsi_period)
-        df['macd'], df['macd_signal'], df['macd_hist'] = calculate_macd(df, self.macd_fast_period, self.macd_slow_period, self.macd_signal_period)
-        df['stochrsi_K'], df['stochrsi_D'] = StochRSI(df['close'], self.stochrsi_period)
+        # Evaluate the indicator graph once, reusing cached nodes for the same bars
+        graph = self.indicator_graph()
+        bars = {source: df[source].to_numpy(dtype=np.float64) for source in graph.sources}
+        # The key covers every column the graph reads, so a revised high/low/volume is recomputed too
+        for column, values in graph.evaluate(bars, indicator_cache, data_key(df[graph.sources])).items():
+            df[column] = values.copy()  # Cached arrays are shared
+        logging.debug(f"Indicator cache: {indicator_cache.stats()}")
         
         return df
 
+    def indicator_graph(self):
+        """Dependency graph of the indicators this strategy reads, for batch evaluation."""
+        return IndicatorGraph(strategy_requests(self.rsi_period, self.macd_fast_period, self.macd_slow_period,
+                                                self.macd_signal_period, self.stochrsi_period))
 
-    def generate_signals(self, df, chart, signal_system_file, ohlcv_file, last_processed_index=None):
-        # Ensure the signal column exists
-        if 'signal' not in df.columns:
-            df['signal'] = 'Hold'  # Default all to 'Hold'
+    def _new_indicator_engine(self):
+        return IndicatorEngine(self.rsi_period, self.macd_fast_period, self.macd_slow_period,
+                               self.macd_signal_period, self.stochrsi_period)
 
-        # Process only new data
-        if last_processed_index is not None:
-            new_data = df.iloc[last_processed_index + 1:].reset_index(drop=True)
-        else:
-            new_data = df
+    def load_indicator_state(self, state_file):
+        """Resume the streaming indicators from a saved state if it was built with the same periods."""
+        if not os.path.exists(state_file):
+            return False
+        try:
+            engine = IndicatorEngine.load(state_file)
+        except Exception as e:
+            logging.error(f"Could not load indicator state from {state_file}: {e}")
+            return False
+        if engine.params != self._new_indicator_engine().params:
+            logging.info(f"Ignoring {state_file}: indicator periods have changed")
+            return False
+        self.indicator_engine = engine
+        return True
+
+    def save_indicator_state(self, state_file):
+        if self.indicator_engine is not None:
+            self.indicator_engine.save(state_file)
+
+    def update_indicators(self, df):
+        """
+        Incrementally compute indicators for the bars of df that have not been seen yet.
+        Only those rows are returned; the first call streams the whole frame to warm up.
+        """
+        if self.indicator_engine is None:
+            self.indicator_engine = self._new_indicator_engine()
+        return self.indicator_engine.update_frame(df)
+
+    def signal_conditions(self, data):
+        """
+        Evaluate the open/close trade conditions for every bar at once.
+        Returns two boolean arrays; the first bar is always False as it has no predecessor.
+        """
+        return compute_signal_conditions(
+            data['stochrsi_K'].to_numpy(dtype=float), data['rsi'].to_numpy(dtype=float),
+            data['macd'].to_numpy(dtype=float), data['macd_signal'].to_numpy(dtype=float),
+            self.rsi_overbought, self.rsi_oversold, self.stochrsi_overbought, self.stochrsi_oversold)
 
-        for i in range(1, len(new_data)):
-            current_signal = 'Hold'
+    def _close_record(self, record, price, time, chart, reason='Close Trade'):
+        record.close_at(price, time)
+        self.pending_records.append(record)
+        chart.marker(time=time, position='above', shape='arrowDown', color='red', text=f"{reason} ({record.pct:.2f}%)")
+        print(f"Signal: {reason} at {format_time(time)} with P&L {record.pct:.2f}%")
 
-            stochrsi_tendency_up = new_data.loc[i, 'stochrsi_K'] > new_data.loc[i-1, 'stochrsi_K']
-            stochrsi_tendency_down = new_data.loc[i, 'stochrsi_K'] < new_data.loc[i-1, 'stochrsi_K']
-            rsi_tendency_up = new_data.loc[i, 'rsi'] > new_data.loc[i-1, 'rsi']
-            rsi_tendency_down = new_data.loc[i, 'rsi'] < new_data.loc[i-1, 'rsi']
+    def check_exits(self, dates, opens, highs, lows, start, stop, chart):
+        """
+        Close open positions whose take-profit/stop-loss was hit on bars [start, stop).
+        Returns the indexes of the bars where a position was closed.
+        """
+        exits = []
+        for position in list(self.position_engine.positions.values()):
+            fill = self.position_engine.first_exit(position, opens, highs, lows, start, stop)
+            if fill is None:
+                continue
+            index, price, reason = fill
+            self.position_engine.close(position)
+            self.trade_open = len(self.position_engine) > 0
+            if position.record is not None:
+                self._close_record(position.record, price, dates[index], chart, reason)
+            exits.append(index)
+        return exits
 
-            stochrsi_range_up = new_data.loc[i, 'stochrsi_K'] < self.stochrsi_overbought
-            stochrsi_range_down = new_data.loc[i, 'stochrsi_K'] > self.stochrsi_oversold
-            rsi_range_up = new_data.loc[i, 'rsi'] < self.rsi_overbought
-            rsi_range_down = new_data.loc[i, 'rsi'] > self.rsi_oversold
+    def apply_signals(self, new_data, chart):
+        """
+        Run the trade_open state machine over the bars where a condition fired and mark the signals.
+        Between those bars, open positions are checked against each bar's high/low for TP/SL exits.
+        """
+        open_trade_condition, close_trade_condition = self.signal_conditions(new_data)
+        candidates = np.flatnonzero(open_trade_condition | close_trade_condition)
+        if len(candidates) == 0 and len(self.position_engine) == 0:
+            return
 
-            open_trade_condition = (stochrsi_tendency_up and rsi_tendency_up and stochrsi_range_up and rsi_range_up) or \
-                                (new_data.loc[i, 'macd'] > new_data.loc[i, 'macd_signal'] and new_data.loc[i-1, 'macd'] <= new_data.loc[i-1, 'macd_signal'])
-            close_trade_condition = (stochrsi_tendency_down and rsi_tendency_down and stochrsi_range_down and rsi_range_down) or \
-                                    (new_data.loc[i, 'macd'] < new_data.loc[i, 'macd_signal'] and new_data.loc[i-1, 'macd'] >= new_data.loc[i-1, 'macd_signal'])
+        dates = new_data['time'].tolist()
+        closes = new_data['close'].tolist()
+        opens = new_data['open'].to_numpy(dtype=float)
+        highs = new_data['high'].to_numpy(dtype=float)
+        lows = new_data['low'].to_numpy(dtype=float)
+        opened, closed = [], []
+        checked = 0  # Bars before this index have been checked for TP/SL
 
-            if open_trade_condition and not self.trade_open:
-                new_data.loc[i, 'signal'] = 'Open Trade'
+        for i in candidates:
+            # Intrabar exits happen before the close-based signal of the same bar
+            exits = self.check_exits(dates, opens, highs, lows, checked, i + 1, chart)
+            closed.extend(exits)
+            checked = i + 1
+            if i in exits:
+                continue  # Stopped out on this bar; no re-entry at its close
+
+            if open_trade_condition[i] and not self.trade_open:
+                opened.append(i)
                 self.trade_open = True
-                self.entry_price = new_data.loc[i, 'close']
-                self.signal_records.append({
-                    'Buy Time': new_data.loc[i, 'date'],
-                    'Buy Price': self.entry_price,
-                    'Take Profit': self.entry_price + (self.entry_price * (self.take_profit / 100)),  # Adjusted for percentage
-                    'Stop Loss': self.entry_price - (self.entry_price * (self.stop_loss / 100)),  # Adjusted for percentage
-                    'Close': None,
-                    'Close Time': None
-                })
-                chart.marker(time=new_data.loc[i, 'date'], position='below', shape='arrowUp', color='green', text='Open Trade!')
+                self.entry_price = closes[i]
+                record = TradeRecord(
+                    dates[i],
+                    self.entry_price,
+                    self.entry_price + (self.entry_price * (self.take_profit / 100)),  # Adjusted for percentage
+                    self.entry_price - (self.entry_price * (self.stop_loss / 100)),  # Adjusted for percentage
+                )
+                self.signal_records.append(record)
+                self.pending_records.append(record)
+                self.position_engine.open(dates[i], self.entry_price, record.take_profit, record.stop_loss, record)
+                chart.marker(time=dates[i], position='below', shape='arrowUp', color='green', text='Open Trade!')
                 print("Signal: Open Trade!")
-            elif close_trade_condition and self.trade_open:
-                new_data.loc[i, 'signal'] = 'Close Trade'
+            elif close_trade_condition[i] and self.trade_open:
+                closed.append(i)
                 self.trade_open = False
-                for signal in self.signal_records:
-                    if signal['Close'] is None:
-                        signal['Close'] = new_data.loc[i, 'close']
-                        signal['Close Time'] = new_data.loc[i, 'date']
-                        profit_loss = (signal['Close'] - signal['Buy Price']) / signal['Buy Price'] * 100
-                        signal['%'] = f"{profit_loss:.2f}%"
-                        chart.marker(time=new_data.loc[i, 'date'], position='above', shape='arrowDown', color='red', text=f"Close Trade ({signal['%']})")
-                        print(f"Signal: Close Trade at {new_data.loc[i, 'date']} with P&L {signal['%']}")
-                        break  # Only close one trade at a time
-
-        # Load existing data from the CSV file
-        try:
-            existing_data = pd.read_csv(ohlcv_file)
-            combined_data = pd.concat([existing_data, new_data]).drop_duplicates(subset='date', keep='last').reset_index(drop=True)
-        except FileNotFoundError:
-            combined_data = new_data
+                # Only close one trade at a time: the oldest open one (positions keep insertion order)
+                position = next(iter(self.position_engine.positions.values()))
+                self.position_engine.close(position)
+                self._close_record(position.record, closes[i], dates[i], chart)
 
-        print("Saving updated dataframe")
-        combined_data.to_csv(ohlcv_file, index=False)
+        closed.extend(self.check_exits(dates, opens, highs, lows, checked, len(new_data), chart))
 
-        # Save the signals
-        signal_df = pd.DataFrame(self.signal_records)
-        
-        if not signal_df.empty:
-            try:
-                # Load existing data from the signal system file
-                existing_signals = pd.read_csv(signal_system_file)
-                
-                # Remove duplicates by comparing 'Buy Time' and 'Close Time'
-                signal_df = signal_df[~signal_df[['Buy Time', 'Close Time']].apply(tuple, axis=1).isin(
-                    existing_signals[['Buy Time', 'Close Time']].apply(tuple, axis=1))]
-                
-            except FileNotFoundError:
-                # If the file does not exist, there are no existing signals to compare with
-                logging.info(f"{signal_system_file} not found. No existing signals to compare.")
-            
-            if not signal_df.empty:
-                # Append the filtered signal_df to the signal system file
-                with open(signal_system_file, mode='a', newline='') as file:
-                    signal_df.to_csv(file, header=file.tell()==0, index=False)
-                print(f"Signals saved to {signal_system_file}.")
-            else:
-                print(f"No new signals to save to {signal_system_file}.")
+        if opened:
+            new_data.loc[new_data.index[opened], 'signal'] = Signal.OPEN
+        if closed:
+            new_data.loc[new_data.index[closed], 'signal'] = Signal.CLOSE
+
+    def _trim_records(self):
+        """Keep open trades and the newest closed ones in memory; every trade is in the ledger by now."""
+        if len(self.signal_records) <= 2 * MAX_CLOSED_RECORDS:
+            return
+        closed = [id(record) for record in self.signal_records if record.closed]
+        keep = set(closed[-MAX_CLOSED_RECORDS:])
+        self.signal_records = [record for record in self.signal_records if not record.closed or id(record) in keep]
+
+    def generate_signals(self, df, chart, signal_system_file, bar_store, last_processed_index=None):
+        # Ensure the signal column exists
+        if 'signal' not in df.columns:
+            df['signal'] = np.int8(Signal.HOLD)  # Default all to Hold
+
+        # Process only new data
+        if last_processed_index is not None:
+            new_data = df.iloc[last_processed_index + 1:].reset_index(drop=True)
         else:
-            print(f"No signals to save to {signal_system_file}.")
+            new_data = df
+
+        self.apply_signals(new_data, chart)
+        if len(new_data):
+            self.last_signal_time = int(new_data['time'].iloc[-1])
 
+        # Write back only the processed bars; the store upserts them by timestamp
+        print("Saving updated bars")
+        bar_store.upsert(new_data)
+
+        # Write only the trades opened or closed since the last call; closed trades update in place
+        if self.pending_records:
+            changed = open_trade_ledger(signal_system_file).upsert(self.pending_records)
+            self.pending_records = []
+            print(f"Saved {changed} trade updates to the ledger of {signal_system_file}.")
+        else:
+            print(f"No new signals to save to {signal_system_file}.")
+        self._trim_records()
 
         return len(df) - 1
 